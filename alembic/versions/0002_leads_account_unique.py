@@ -0,0 +1,25 @@
+"""One lead per account, so scoring can upsert on account_id."""
+
+from __future__ import annotations
+
+from alembic import op  # type: ignore[attr-defined]
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the most recently updated lead when an account was scored twice.
+    op.execute("""
+        DELETE FROM leads l
+        USING leads d
+        WHERE l.account_id = d.account_id
+          AND (l.updated_at, l.id) < (d.updated_at, d.id)
+        """)
+    op.create_unique_constraint("leads_account_id_key", "leads", ["account_id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("leads_account_id_key", "leads", type_="unique")
@@ -0,0 +1,27 @@
+"""Per-hashtag high-water marks for incremental crawling."""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op  # type: ignore[attr-defined]
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "hashtag_cursors",
+        sa.Column("hashtag_id", sa.String, primary_key=True),
+        sa.Column("last_media_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_media_id", sa.String),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("hashtag_cursors")
@@ -0,0 +1,46 @@
+"""Indexes for keyset pagination of leads and the username lookup."""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op  # type: ignore[attr-defined]
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Build without blocking writes; CONCURRENTLY cannot run in a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_leads_confidence_id",
+            "leads",
+            [sa.text("confidence DESC"), sa.text("id DESC")],
+            postgresql_include=["account_id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_accounts_source_id",
+            "accounts",
+            ["source", "id"],
+            postgresql_include=["username"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_accounts_username",
+            "accounts",
+            ["username"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+    # The unique index declared on the model replaces 0001's constraint.
+    op.drop_constraint("accounts_username_key", "accounts", type_="unique")
+
+
+def downgrade() -> None:
+    op.create_unique_constraint("accounts_username_key", "accounts", ["username"])
+    op.drop_index("ix_accounts_username", "accounts")
+    op.drop_index("ix_accounts_source_id", "accounts")
+    op.drop_index("ix_leads_confidence_id", "leads")
@@ -0,0 +1,24 @@
+"""Index for the orchestrator's scan of accounts by status and age."""
+
+from __future__ import annotations
+
+from alembic import op  # type: ignore[attr-defined]
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_accounts_status_created_at",
+            "accounts",
+            ["status", "created_at"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_accounts_status_created_at", "accounts")
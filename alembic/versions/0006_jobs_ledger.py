@@ -0,0 +1,32 @@
+"""Job ledger timestamps and indexes for polling /jobs."""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op  # type: ignore[attr-defined]
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_jobs_created_at_id": ["created_at", "id"],
+    "ix_jobs_status_created_at_id": ["status", "created_at", "id"],
+    "ix_jobs_type_created_at_id": ["type", "created_at", "id"],
+}
+
+
+def upgrade() -> None:
+    op.add_column("jobs", sa.Column("started_at", sa.DateTime(timezone=True)))
+    op.add_column("jobs", sa.Column("finished_at", sa.DateTime(timezone=True)))
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, "jobs", columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.drop_index(name, "jobs")
+    op.drop_column("jobs", "finished_at")
+    op.drop_column("jobs", "started_at")
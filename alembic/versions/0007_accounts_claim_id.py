@@ -0,0 +1,19 @@
+"""Token of the orchestrator claim holding an account."""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op  # type: ignore[attr-defined]
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("accounts", sa.Column("claim_id", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("accounts", "claim_id")
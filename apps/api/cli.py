@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
+import json
+
 import typer
 
-from services.workers import worker
+from services.ranking import training
+from services.ranking.pipeline import BULK_CHUNK_SIZE
+from services.ranking.training import TRAIN_CHUNK_SIZE
+from services.workers import orchestrator, worker
 
 app = typer.Typer()
 
@@ -25,9 +30,29 @@ def discover_places(category: str, city: str):
 
 
 @app.command()
-def score_leads(rebuild_model: bool = False):
-    # Placeholder: in MVP we just print
-    print("scoring leads", rebuild_model)
+def score_leads(rebuild_model: bool = False, chunk_size: int = BULK_CHUNK_SIZE):
+    # Pin the rescore to the new model so workers reload it before scoring.
+    version = train_model()["version"] if rebuild_model else None
+    worker.enqueue_score_bulk(chunk_size, version)
+
+
+@app.command()
+def train_model(
+    chunk_size: int = TRAIN_CHUNK_SIZE, folds: int = 5, epochs: int = 3
+) -> dict:
+    report = training.train_model(chunk_size=chunk_size, folds=folds, epochs=epochs)
+    typer.echo(json.dumps(report))
+    return report
+
+
+@app.command()
+def orchestrate(
+    interval: float = orchestrator.ORCHESTRATE_INTERVAL, once: bool = False
+):
+    if once:
+        typer.echo(json.dumps(orchestrator.tick()))
+    else:
+        orchestrator.run(interval)
 
 
 if __name__ == "__main__":
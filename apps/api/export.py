@@ -0,0 +1,109 @@
+"""Encoders for streaming lead exports.
+
+Each encoder takes an async iterator of row chunks and yields encoded bytes
+per chunk, so only one chunk is held in memory at a time.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Callable, Sequence
+
+RowChunks = AsyncIterator[Sequence[Any]]
+
+EXPORT_COLUMNS = ("id", "username", "confidence", "reason", "tags", "stage")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def lead_record(row: Any) -> dict:
+    return {
+        "id": str(row.id),
+        "username": row.username,
+        "confidence": float(row.confidence or 0),
+        "reason": row.reason,
+        "tags": row.tags,
+        "stage": row.stage,
+    }
+
+
+async def encode_ndjson(chunks: RowChunks) -> AsyncIterator[bytes]:
+    async for rows in chunks:
+        yield "".join(json.dumps(lead_record(r)) + "\n" for r in rows).encode()
+
+
+async def encode_csv(chunks: RowChunks) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    async for rows in chunks:
+        for row in rows:
+            record = lead_record(row)
+            record["tags"] = json.dumps(record["tags"]) if record["tags"] else ""
+            writer.writerow(record)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since last drain."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def parquet_encoder() -> Callable[[RowChunks], AsyncIterator[bytes]]:
+    """Return the Parquet encoder; raises ImportError without pyarrow."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("id", pa.string()),
+            ("username", pa.string()),
+            ("confidence", pa.float64()),
+            ("reason", pa.string()),
+            ("tags", pa.list_(pa.string())),
+            ("stage", pa.string()),
+        ]
+    )
+
+    async def encode_parquet(chunks: RowChunks) -> AsyncIterator[bytes]:
+        sink = _DrainableSink()
+        with pq.ParquetWriter(sink, schema) as writer:
+            async for rows in chunks:
+                # One row group per chunk keeps the writer's buffer bounded.
+                writer.write_table(
+                    pa.Table.from_pylist([lead_record(r) for r in rows], schema)
+                )
+                yield sink.drain()
+        yield sink.drain()
+
+    return encode_parquet
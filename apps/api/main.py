@@ -2,20 +2,47 @@
 
 from __future__ import annotations
 
+import base64
+import json
 import os
-from typing import Optional
+import tempfile
+import uuid
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Literal, Optional, Sequence
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
-from fastapi.responses import PlainTextResponse
-from sqlalchemy import select
+from fastapi import FastAPI, File, HTTPException, Query, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from rq.exceptions import NoSuchGroupError, NoSuchJobError
+from sqlalchemy import Row, Select, select, tuple_
+
+from apps.api.export import (
+    MEDIA_TYPES,
+    encode_csv,
+    encode_ndjson,
+    lead_record,
+    parquet_encoder,
+)
 
 from services.workers import worker
-from shared.db import session_scope
+from shared.db import async_session_scope, dispose_async_engine, session_scope
 from shared.models import Account, Lead, Job
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    await dispose_async_engine()
+
+
+app = FastAPI(lifespan=lifespan)
 
 API_KEY = os.getenv("API_KEY", "dev-local")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_PAGE_SIZE = 500
+EXPORT_CHUNK_SIZE = 5000
 
 
 @app.middleware("http")
@@ -42,11 +69,26 @@ def discover_hashtags(body: dict):
 
 @app.post("/discover/websearch")
 async def discover_websearch(file: UploadFile = File(...)):
-    path = f"/tmp/{file.filename}"
-    with open(path, "wb") as f:
-        f.write(await file.read())
-    worker.enqueue_import_csv(path)
-    return {"status": "enqueued"}
+    fd, path = tempfile.mkstemp(prefix="websearch-", suffix=".csv")
+    with os.fdopen(fd, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            # Disk writes would otherwise block the event loop.
+            await run_in_threadpool(f.write, chunk)
+    job = worker.enqueue_import_csv(path, delete_after=True)
+    return {"status": "enqueued", "job_id": job.id}
+
+
+@app.get("/discover/websearch/{job_id}")
+def discover_websearch_status(job_id: str):
+    try:
+        job = worker.fetch_job(job_id)
+    except NoSuchJobError:
+        raise HTTPException(404, "Job not found")
+    return {
+        "status": job.get_status(),
+        "progress": job.meta.get("progress"),
+        "result": job.return_value(),
+    }
 
 
 @app.post("/discover/places")
@@ -57,37 +99,115 @@ def discover_places(body: dict):
 
 @app.post("/enrich")
 def enrich(body: dict):
-    usernames = body.get("usernames", [])
-    for u in usernames:
-        worker.enqueue_enrich(u)
-    return {"enqueued": len(usernames)}
+    return worker.enqueue_enrich_bulk(body.get("usernames", []))
+
+
+@app.get("/enrich/{batch_id}")
+def enrich_status(batch_id: str):
+    try:
+        return worker.fetch_enrich_batch(batch_id)
+    except NoSuchGroupError:
+        raise HTTPException(404, "Batch not found")
+
+
+def _encode_cursor(*values: Any) -> str:
+    raw = json.dumps([str(v) for v in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, *types: Callable[[str], Any]) -> tuple:
+    """Decode a cursor into values parsed by ``types``, in order."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(parse(v) for parse, v in zip(types, values))
+    except (ValueError, TypeError, ArithmeticError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def _leads_query(min_confidence: float, source: Optional[str]) -> Select:
+    stmt = (
+        select(
+            Lead.id,
+            Account.username,
+            Lead.confidence,
+            Lead.reason,
+            Lead.tags,
+            Lead.stage,
+        )
+        .join(Account, Lead.account_id == Account.id)
+        .where(Lead.confidence >= min_confidence)
+    )
+    if source:
+        stmt = stmt.where(Account.source == source)
+    return stmt
 
 
 @app.get("/leads")
-def get_leads(
+async def get_leads(
+    response: Response,
     min_confidence: float = 0.0,
     source: Optional[str] = None,
-    page: int = 1,
-    page_size: int = 20,
+    cursor: Optional[str] = None,
+    page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    page: Optional[int] = Query(None, ge=1, deprecated=True),
 ):
-    with session_scope() as session:
-        stmt = select(Lead).join(Account).where(Lead.confidence >= min_confidence)
-        if source:
-            stmt = stmt.where(Account.source == source)
-        leads = session.scalars(
-            stmt.offset((page - 1) * page_size).limit(page_size)
-        ).all()
-        return [
-            {
-                "id": str(lead.id),
-                "username": lead.account.username if lead.account else None,
-                "confidence": float(lead.confidence or 0),
-                "reason": lead.reason,
-                "tags": lead.tags,
-                "stage": lead.stage,
-            }
-            for lead in leads
-        ]
+    """List leads by descending confidence.
+
+    Pages are keyed on ``(confidence, id)`` rather than an offset; when more
+    rows may follow, the cursor for the next page is sent in ``X-Next-Cursor``.
+    ``page`` is still honoured as an offset for old clients, but deep pages
+    get slower with it; follow the cursor instead.
+    """
+    stmt = _leads_query(min_confidence, source).order_by(
+        Lead.confidence.desc(), Lead.id.desc()
+    )
+    if cursor:
+        confidence, lead_id = _decode_cursor(cursor, Decimal, uuid.UUID)
+        stmt = stmt.where(tuple_(Lead.confidence, Lead.id) < (confidence, lead_id))
+    elif page:
+        stmt = stmt.offset((page - 1) * page_size)
+    async with async_session_scope() as session:
+        result = await session.execute(stmt.limit(page_size))
+        rows = result.all()
+    if len(rows) == page_size:
+        response.headers["X-Next-Cursor"] = _encode_cursor(
+            rows[-1].confidence, rows[-1].id
+        )
+    return [lead_record(row) for row in rows]
+
+
+async def _stream_rows(stmt: Select) -> AsyncIterator[Sequence[Row]]:
+    async with async_session_scope() as session:
+        result = await session.stream(
+            stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        async for rows in result.partitions():
+            yield rows
+
+
+@app.get("/leads/export")
+async def export_leads(
+    min_confidence: float = 0.0,
+    source: Optional[str] = None,
+    format: Literal["ndjson", "csv", "parquet"] = "ndjson",
+):
+    """Stream every matching lead through a server-side cursor."""
+    if format == "parquet":
+        try:
+            encode = parquet_encoder()
+        except ImportError:
+            raise HTTPException(501, "Parquet export requires pyarrow")
+    else:
+        encode = encode_csv if format == "csv" else encode_ndjson
+    body = encode(_stream_rows(_leads_query(min_confidence, source)))
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="leads.{format}"'},
+    )
 
 
 @app.patch("/leads/{lead_id}")
@@ -102,20 +222,58 @@ def update_lead(lead_id: str, body: dict):
 
 
 @app.get("/jobs")
-def get_jobs():
-    with session_scope() as session:
-        jobs = session.scalars(
-            select(Job).order_by(Job.created_at.desc()).limit(100)
-        ).all()
-        return [
-            {
-                "id": str(j.id),
-                "type": j.type,
-                "status": j.status,
-                "error": j.error,
-            }
-            for j in jobs
-        ]
+async def get_jobs(
+    response: Response,
+    status: Optional[str] = None,
+    job_type: Optional[str] = Query(None, alias="type"),
+    cursor: Optional[str] = None,
+    page_size: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """List jobs from the ledger, newest first, keyed on ``(created_at, id)``."""
+    stmt = select(
+        Job.id,
+        Job.type,
+        Job.status,
+        Job.attempts,
+        Job.error,
+        Job.created_at,
+        Job.started_at,
+        Job.finished_at,
+    )
+    if status:
+        stmt = stmt.where(Job.status == status)
+    if job_type:
+        stmt = stmt.where(Job.type == job_type)
+    if cursor:
+        created_at, job_id = _decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)
+        stmt = stmt.where(tuple_(Job.created_at, Job.id) < (created_at, job_id))
+    async with async_session_scope() as session:
+        result = await session.execute(
+            stmt.order_by(Job.created_at.desc(), Job.id.desc()).limit(page_size)
+        )
+        rows = result.all()
+    if len(rows) == page_size:
+        response.headers["X-Next-Cursor"] = _encode_cursor(
+            rows[-1].created_at.isoformat(), rows[-1].id
+        )
+    return [
+        {
+            "id": str(row.id),
+            "type": row.type,
+            "status": row.status,
+            "attempts": row.attempts,
+            "error": row.error,
+            "created_at": row.created_at,
+            "started_at": row.started_at,
+            "finished_at": row.finished_at,
+            "duration": (
+                (row.finished_at - row.started_at).total_seconds()
+                if row.started_at and row.finished_at
+                else None
+            ),
+        }
+        for row in rows
+    ]
 
 
 @app.get("/metrics")
@@ -0,0 +1,62 @@
+"""Measure RQ enqueue throughput against fakeredis.
+
+Compares building a ``Queue`` per call (the old enqueue helpers), reusing
+the cached queue from ``shared.redis_client.get_queue``, and enqueueing in
+one pipeline with ``enqueue_many`` as ``/enrich`` does::
+
+    python -m benchmarks.enqueue_throughput --jobs 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable
+
+import fakeredis
+from rq import Queue
+
+from shared import redis_client
+from shared.job_ledger import LedgerQueue
+
+FUNC = "services.enrichment.enrichment_service.enrich_account"
+
+
+def per_call_queue(jobs: int) -> None:
+    connection = redis_client.get_redis()
+    for i in range(jobs):
+        LedgerQueue("enrich", connection=connection).enqueue(FUNC, f"user{i}")
+
+
+def cached_queue(jobs: int) -> None:
+    for i in range(jobs):
+        redis_client.get_queue("enrich").enqueue(FUNC, f"user{i}")
+
+
+def pipelined(jobs: int) -> None:
+    redis_client.get_queue("enrich").enqueue_many(
+        [Queue.prepare_data(FUNC, (f"user{i}",)) for i in range(jobs)]
+    )
+
+
+def run(name: str, fn: Callable[[int], None], jobs: int) -> None:
+    redis_client._redis = fakeredis.FakeRedis()
+    redis_client._queues = {}
+    started = time.perf_counter()
+    fn(jobs)
+    elapsed = time.perf_counter() - started
+    assert redis_client.get_queue("enrich").count == jobs
+    print(f"{name:<16} {jobs / elapsed:>10.0f} jobs/s  ({elapsed:.3f}s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=2000)
+    args = parser.parse_args()
+    run("per-call queue", per_call_queue, args.jobs)
+    run("cached queue", cached_queue, args.jobs)
+    run("enqueue_many", pipelined, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,16 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
 
 from sqlalchemy import select
+from sqlalchemy.orm import Session
 
 from shared import graph_client
 from shared.db import session_scope
 from shared.models import Account, Audit
+from shared.rate_limit import RateLimitExceeded
 
 BUSINESS_FIELDS = [
     "username",
@@ -23,43 +26,127 @@ BUSINESS_FIELDS = [
     "category_name",
 ]
 
+# Statuses set by a completed lookup; accounts in them are skipped for a week.
+ENRICHED_STATUSES = ("ENRICHED", "NOT_FOUND", "NOT_PRO_ACCOUNT")
+REFRESH_AFTER = timedelta(days=7)
 
-def enrich_account(username: str, force: bool = False) -> None:
+
+def _is_fresh(account: Account) -> bool:
+    if account.status not in ENRICHED_STATUSES or not account.updated_at:
+        return False
+    updated_at = account.updated_at
+    now = datetime.now(timezone.utc) if updated_at.tzinfo else datetime.utcnow()
+    return now - updated_at < REFRESH_AFTER
+
+
+def recently_enriched(usernames: list[str]) -> set[str]:
+    """Return the usernames whose committed lookup is less than a week old."""
     with session_scope() as session:
-        account = session.scalar(select(Account).where(Account.username == username))
-        if not account:
+        accounts = session.scalars(
+            select(Account).where(
+                Account.username.in_(usernames),
+                Account.status.in_(ENRICHED_STATUSES),
+            )
+        )
+        return {a.username for a in accounts if _is_fresh(a)}
+
+
+def _apply(session: Session, account: Account, data: dict | None) -> str:
+    if not data:
+        account.status = "NOT_FOUND"
+        return account.status
+    if not data.get("is_business_account") and not data.get("is_professional_account"):
+        account.status = "NOT_PRO_ACCOUNT"
+        return account.status
+    account.name = data.get("name")
+    account.bio = data.get("biography")
+    account.website = data.get("website")
+    account.profile_pic_url = data.get("profile_picture_url")
+    account.metrics_json = {
+        "media_count": data.get("media_count"),
+        "followers_count": data.get("followers_count"),
+        "follows_count": data.get("follows_count"),
+    }
+    account.category = data.get("category_name") or data.get("category")
+    account.is_professional = True
+    account.status = "ENRICHED"
+    session.add(
+        Audit(
+            action="enrich",
+            entity="account",
+            entity_id=str(account.id),
+            payload_json=data,
+        )
+    )
+    return account.status
+
+
+def _load_accounts(session: Session, usernames: list[str]) -> dict[str, Account]:
+    accounts = {
+        a.username: a
+        for a in session.scalars(select(Account).where(Account.username.in_(usernames)))
+    }
+    for username in usernames:
+        if username not in accounts:
             account = Account(username=username, source="manual", status="DISCOVERED")
             session.add(account)
-            session.flush()
-        if account.updated_at and not force:
-            if datetime.utcnow() - account.updated_at < timedelta(days=7):
-                return
-        data = graph_client.business_discovery(username, BUSINESS_FIELDS)
-        if not data:
-            account.status = "NOT_FOUND"
-            return
-        if not data.get("is_business_account") and not data.get(
-            "is_professional_account"
-        ):
-            account.status = "NOT_PRO_ACCOUNT"
+            accounts[username] = account
+    session.flush()
+    return accounts
+
+
+def enrich_account(username: str, force: bool = False) -> None:
+    with session_scope() as session:
+        account = _load_accounts(session, [username])[username]
+        if _is_fresh(account) and not force:
             return
-        account.name = data.get("name")
-        account.bio = data.get("biography")
-        account.website = data.get("website")
-        account.profile_pic_url = data.get("profile_picture_url")
-        account.metrics_json = {
-            "media_count": data.get("media_count"),
-            "followers_count": data.get("followers_count"),
-            "follows_count": data.get("follows_count"),
-        }
-        account.category = data.get("category_name") or data.get("category")
-        account.is_professional = True
-        account.status = "ENRICHED"
-        session.add(
-            Audit(
-                action="enrich",
-                entity="account",
-                entity_id=str(account.id),
-                payload_json=data,
+    # Look up outside the transaction; the rate limiter may make us wait.
+    data = graph_client.business_discovery(username, BUSINESS_FIELDS)
+    with session_scope() as session:
+        _apply(session, _load_accounts(session, [username])[username], data)
+
+
+def enrich_accounts(
+    usernames: Iterable[str], force: bool = False, max_wait: float | None = None
+) -> dict:
+    """Enrich many accounts with batched lookups.
+
+    Lookups run outside any transaction and each batch is saved in its own.
+    Usernames whose lookup failed transiently, or whose batch would have to
+    wait longer than ``max_wait`` seconds for rate-limit budget, are returned
+    under ``retry``; ``retry_after`` is the wait that was refused. Token or
+    permission errors raise ``GraphAPIError`` after the earlier batches are
+    saved.
+    """
+    usernames = list(dict.fromkeys(usernames))
+    counts = {status: 0 for status in ENRICHED_STATUSES}
+    retry: list[str] = []
+    retry_after = None
+    with session_scope() as session:
+        accounts = _load_accounts(session, usernames)
+        pending = [u for u in usernames if force or not _is_fresh(accounts[u])]
+    for start in range(0, len(pending), graph_client.BATCH_SIZE):
+        chunk = pending[start : start + graph_client.BATCH_SIZE]
+        try:
+            results = graph_client.business_discovery_batch(
+                chunk, BUSINESS_FIELDS, max_wait=max_wait
             )
-        )
+        except RateLimitExceeded as exc:
+            retry.extend(pending[start:])
+            retry_after = exc.wait
+            break
+        with session_scope() as session:
+            accounts = _load_accounts(session, chunk)
+            for username in chunk:
+                if username not in results:
+                    retry.append(username)
+                    continue
+                counts[_apply(session, accounts[username], results[username])] += 1
+    return {
+        "enriched": counts["ENRICHED"],
+        "not_found": counts["NOT_FOUND"],
+        "not_pro_account": counts["NOT_PRO_ACCOUNT"],
+        "skipped": len(usernames) - len(pending),
+        "retry": retry,
+        "retry_after": retry_after,
+    }
@@ -2,20 +2,47 @@
 
 from __future__ import annotations
 
-from typing import Iterator, List
+import uuid
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, NamedTuple
 
+from rq import Queue
+from rq.job import Dependency
 from sqlalchemy import select
 
 from shared import graph_client
-from shared.db import session_scope
-from shared.models import Account
+from shared.db import dialect_insert, session_scope
+from shared.models import HashtagCursor
+from shared.redis_client import get_queue, get_redis
+
+from .writer import persist_discovered, persist_media
+
+RUN_TTL = 24 * 3600
+
+
+class HighWaterMark(NamedTuple):
+    taken_at: datetime
+    media_id: str | None
+
+
+def _naive_utc(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+
+def parse_timestamp(value: str | None) -> datetime | None:
+    """Parse a Graph API timestamp into a naive UTC datetime."""
+    if not value:
+        return None
+    try:
+        return _naive_utc(datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z"))
+    except ValueError:
+        return None
 
 
 def search_ids(queries: List[str]) -> List[str]:
     ids: list[str] = []
     seen: set[str] = set()
-    for q in queries:
-        results = graph_client.ig_hashtag_search(q)
+    for results in graph_client.ig_hashtag_search_many(queries):
         for item in results:
             hid = item.get("id")
             if hid and hid not in seen:
@@ -25,39 +52,168 @@ def search_ids(queries: List[str]) -> List[str]:
 
 
 def fetch_recent_media(
-    hashtag_id: str, since_cursor: str | None = None
+    hashtag_id: str,
+    since_cursor: str | None = None,
+    stop_at: HighWaterMark | None = None,
 ) -> Iterator[dict]:
+    """Page through recent media, newest first.
+
+    With ``stop_at`` paging ends at the marked item or the first one older
+    than it, so a repeat crawl only pays for posts published since.
+    """
     cursor = since_cursor
     while True:
         data = graph_client.hashtag_recent_media(hashtag_id, cursor)
         for item in data.get("data", []):
+            if stop_at is not None:
+                taken_at = parse_timestamp(item.get("timestamp"))
+                if item.get("id") == stop_at.media_id or (
+                    taken_at is not None and taken_at < stop_at.taken_at
+                ):
+                    return
             yield item
         cursor = data.get("paging", {}).get("cursors", {}).get("after")
         if not cursor:
             break
 
 
+def load_marks(hashtag_ids: Iterable[str]) -> dict[str, HighWaterMark]:
+    with session_scope() as session:
+        rows = session.scalars(
+            select(HashtagCursor).where(HashtagCursor.hashtag_id.in_(list(hashtag_ids)))
+        )
+        return {
+            r.hashtag_id: HighWaterMark(_naive_utc(r.last_media_at), r.last_media_id)
+            for r in rows
+        }
+
+
+def save_marks(marks: dict[str, HighWaterMark]) -> None:
+    if not marks:
+        return
+    now = datetime.utcnow()
+    with session_scope() as session:
+        stmt = dialect_insert(session, HashtagCursor).values(
+            [
+                {
+                    "hashtag_id": hid,
+                    "last_media_at": mark.taken_at,
+                    "last_media_id": mark.media_id,
+                    "updated_at": now,
+                }
+                for hid, mark in marks.items()
+            ]
+        )
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[HashtagCursor.hashtag_id],
+                set_={
+                    "last_media_at": stmt.excluded.last_media_at,
+                    "last_media_id": stmt.excluded.last_media_id,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+
+
+def _crawl(
+    hashtag_id: str, mark: HighWaterMark | None
+) -> tuple[list[tuple[str, str, dict]], list[dict], HighWaterMark | None]:
+    rows: list[tuple[str, str, dict]] = []
+    media_rows: list[dict] = []
+    seen: set[str] = set()
+    newest: HighWaterMark | None = None
+    for media in fetch_recent_media(hashtag_id, None, stop_at=mark):
+        taken_at = parse_timestamp(media.get("timestamp"))
+        if taken_at and (newest is None or taken_at > newest.taken_at):
+            newest = HighWaterMark(taken_at, media.get("id"))
+        username = (media.get("username") or "").lower()
+        if not username:
+            continue
+        if username not in seen:
+            seen.add(username)
+            rows.append((username, "hashtag", {"hashtag_id": hashtag_id}))
+        if media.get("id"):
+            media_rows.append(
+                {
+                    "username": username,
+                    "ig_media_id": media["id"],
+                    "caption": media.get("caption"),
+                    "media_type": media.get("media_type"),
+                    "permalink": media.get("permalink"),
+                    "taken_at": taken_at,
+                }
+            )
+    return rows, media_rows, newest
+
+
+def _persist(rows: Iterable[tuple[str, str, dict]], media: list[dict]) -> None:
+    persist_discovered(rows)
+    persist_media(media)
+
+
 def discover_usernames(queries: List[str]) -> List[str]:
-    usernames: set[str] = set()
+    """Resolve and crawl every hashtag in-process, one after another."""
+    rows: dict[str, tuple[str, str, dict]] = {}
+    media: list[dict] = []
     hashtag_ids = search_ids(queries)
+    marks = load_marks(hashtag_ids)
+    new_marks: dict[str, HighWaterMark] = {}
     for hid in hashtag_ids:
-        for media in fetch_recent_media(hid, None):
-            username = media.get("username")
-            if username:
-                usernames.add(username.lower())
-                _persist_account(username, "hashtag", {"hashtag_id": hid})
-    return list(usernames)
+        crawled, crawled_media, newest = _crawl(hid, marks.get(hid))
+        for row in crawled:
+            rows.setdefault(row[0], row)
+        media.extend(crawled_media)
+        if newest:
+            new_marks[hid] = newest
+    _persist(rows.values(), media)
+    # Only advance the marks once the accounts they cover are stored.
+    save_marks(new_marks)
+    return list(rows)
 
 
-def _persist_account(username: str, source: str, details: dict) -> None:
-    with session_scope() as session:
-        existing = session.scalar(select(Account).where(Account.username == username))
-        if existing:
-            return
-        acc = Account(
-            username=username,
-            source=source,
-            source_details=details,
-            status="DISCOVERED",
-        )
-        session.add(acc)
+def _run_key(run_id: str) -> str:
+    return f"discover:{run_id}:usernames"
+
+
+def crawl_hashtag(hashtag_id: str, run_id: str | None = None) -> int:
+    """Crawl one hashtag; with ``run_id`` usernames join the run's Redis set."""
+    rows, media, newest = _crawl(hashtag_id, load_marks([hashtag_id]).get(hashtag_id))
+    _persist(rows, media)
+    if newest:
+        save_marks({hashtag_id: newest})
+    if run_id and rows:
+        with get_redis().pipeline(transaction=False) as pipe:
+            pipe.sadd(_run_key(run_id), *(row[0] for row in rows))
+            pipe.expire(_run_key(run_id), RUN_TTL)
+            pipe.execute()
+    return len(rows)
+
+
+def merge_discovery(run_id: str) -> List[str]:
+    key = _run_key(run_id)
+    with get_redis().pipeline() as pipe:
+        pipe.smembers(key)
+        pipe.delete(key)
+        members, _ = pipe.execute()
+    return sorted(m.decode() for m in members)
+
+
+def fan_out_discovery(queries: List[str]) -> dict:
+    """Resolve hashtags, then crawl each in its own job and merge at the end.
+
+    The crawl jobs run in parallel across workers; the merge job depends on
+    all of them and still runs if some fail.
+    """
+    hashtag_ids = search_ids(queries)
+    run_id = uuid.uuid4().hex
+    queue = get_queue("discover")
+    crawls = queue.enqueue_many(
+        [Queue.prepare_data(crawl_hashtag, (hid, run_id)) for hid in hashtag_ids]
+    )
+    merge = queue.enqueue(
+        merge_discovery,
+        run_id,
+        depends_on=Dependency(jobs=crawls, allow_failure=True) if crawls else None,
+    )
+    return {"run_id": run_id, "hashtags": len(hashtag_ids), "merge_job_id": merge.id}
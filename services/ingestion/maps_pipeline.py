@@ -2,18 +2,24 @@
 
 from __future__ import annotations
 
+import asyncio
+import os
 import re
-import time
-from typing import List
+from typing import Iterable, List
+from urllib.parse import urlsplit
 
-import requests  # type: ignore[import]
-from sqlalchemy import select
+import httpx
 
-from shared.db import session_scope
-from shared.models import Account
+from .writer import persist_discovered
 
 HANDLE_RE = re.compile(r"instagram\.com/([A-Za-z0-9_\.]+)")
 
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "32"))
+PER_HOST_INTERVAL = 1.0
+MAX_BODY_BYTES = 512 * 1024
+FETCH_TIMEOUT = 5.0
+_BODY_END = b"</body>"
+
 
 class PlacesProvider:
     def search(self, category: str, city: str) -> List[str]:
@@ -25,30 +31,87 @@ class PlacesProvider:
         ]
 
 
+class HostThrottle:
+    """Spaces requests to the same host at least ``interval`` seconds apart."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._next_slot: dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def _fetch_text(client: httpx.AsyncClient, url: str, max_bytes: int) -> str:
+    body = bytearray()
+    async with client.stream("GET", url) as resp:
+        async for chunk in resp.aiter_bytes():
+            # Only scan the new bytes, plus enough overlap for a split tag.
+            start = max(len(body) - len(_BODY_END) + 1, 0)
+            body += chunk
+            end = bytes(body[start:]).lower().find(_BODY_END)
+            if end != -1:
+                del body[start + end + len(_BODY_END) :]
+                break
+            if len(body) >= max_bytes:
+                break
+        encoding = resp.encoding or "utf-8"
+    return bytes(body[:max_bytes]).decode(encoding, errors="replace")
+
+
+async def crawl_instagram_links(
+    urls: Iterable[str],
+    concurrency: int = CRAWL_CONCURRENCY,
+    per_host_interval: float = PER_HOST_INTERVAL,
+    max_bytes: int = MAX_BODY_BYTES,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> dict[str, List[str]]:
+    """Fetch websites concurrently and return the Instagram handles per URL.
+
+    Requests to one host are throttled, different hosts are fetched in
+    parallel over a shared connection pool, and bodies are read only up to
+    ``</body>`` or ``max_bytes``.
+    """
+    throttle = HostThrottle(per_host_interval)
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        timeout=FETCH_TIMEOUT,
+        follow_redirects=True,
+        limits=limits,
+        transport=transport,
+    ) as client:
+
+        async def visit(url: str) -> tuple[str, List[str]]:
+            try:
+                await throttle.wait(urlsplit(url).hostname or "")
+                async with semaphore:
+                    text = await _fetch_text(client, url, max_bytes)
+            except (httpx.HTTPError, httpx.InvalidURL, ValueError):
+                # Malformed or unreachable sites just yield no handles.
+                return url, []
+            return url, [m.group(1).lower() for m in HANDLE_RE.finditer(text)]
+
+        return dict(await asyncio.gather(*map(visit, dict.fromkeys(urls))))
+
+
 def find_instagram_links(url: str) -> List[str]:
-    time.sleep(1)  # throttle
-    try:
-        resp = requests.get(url, timeout=5)
-    except Exception:
-        return []
-    return [m.group(1).lower() for m in HANDLE_RE.finditer(resp.text)]
+    return asyncio.run(crawl_instagram_links([url]))[url]
 
 
 def discover_from_maps(category: str, city: str) -> List[str]:
     provider = PlacesProvider()
     websites = provider.search(category, city)
     handles: set[str] = set()
-    for url in websites:
-        handles.update(find_instagram_links(url))
+    for found in asyncio.run(crawl_instagram_links(websites)).values():
+        handles.update(found)
     persist_handles(list(handles), source="maps")
     return list(handles)
 
 
-def persist_handles(handles: List[str], source: str) -> None:
-    with session_scope() as session:
-        for handle in handles:
-            existing = session.scalar(select(Account).where(Account.username == handle))
-            if existing:
-                continue
-            acc = Account(username=handle, source=source, status="DISCOVERED")
-            session.add(acc)
+def persist_handles(handles: List[str], source: str) -> dict:
+    return persist_discovered((handle, source, None) for handle in handles)
@@ -5,14 +5,14 @@ from __future__ import annotations
 import csv
 import re
 from pathlib import Path
-from typing import List
+from typing import Callable, List
 
-from sqlalchemy import select
+from rq import get_current_job
 
-from shared.db import session_scope
-from shared.models import Account
+from .writer import persist_discovered
 
 HANDLE_RE = re.compile(r"instagram\.com/([A-Za-z0-9_\.]+)")
+IMPORT_BATCH_SIZE = 5000
 
 
 def parse_urls_to_handles(urls: List[str]) -> List[str]:
@@ -25,28 +25,55 @@ def parse_urls_to_handles(urls: List[str]) -> List[str]:
 
 
 def persist_handles(handles: List[str], source: str = "web_search") -> dict:
-    inserted = 0
-    duplicates = 0
-    with session_scope() as session:
-        for handle in handles:
-            existing = session.scalar(select(Account).where(Account.username == handle))
-            if existing:
-                duplicates += 1
-                continue
-            acc = Account(username=handle, source=source, status="DISCOVERED")
-            session.add(acc)
-            inserted += 1
-    return {"inserted": inserted, "duplicates": duplicates, "total": len(handles)}
-
-
-def import_csv(file_path: Path) -> dict:
-    urls: list[str] = []
-    with file_path.open() as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if "url" in row:
-                urls.append(row["url"])
-    handles = parse_urls_to_handles(urls)
-    result = persist_handles(handles)
-    result["valid_handles"] = len(handles)
-    return result
+    return persist_discovered((handle, source, None) for handle in handles)
+
+
+def _report_job_progress(stats: dict) -> None:
+    job = get_current_job()
+    if job:
+        job.meta["progress"] = stats
+        job.save_meta()
+
+
+def import_csv(
+    file_path: str | Path,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    progress: Callable[[dict], None] = _report_job_progress,
+    delete_after: bool = False,
+) -> dict:
+    """Stream a CSV with a ``url`` column into the accounts table.
+
+    Handles are flushed every ``batch_size`` unique handles, so memory stays
+    constant regardless of file size. ``progress`` receives the running
+    totals after each flush and once the file is done.
+    """
+    path = Path(file_path)
+    stats = {"rows": 0, "valid_handles": 0, "inserted": 0, "duplicates": 0, "total": 0}
+    batch: set[str] = set()
+
+    def flush() -> None:
+        result = persist_handles(list(batch))
+        for key in ("inserted", "duplicates", "total"):
+            stats[key] += result[key]
+        batch.clear()
+        progress(dict(stats))
+
+    try:
+        with path.open(newline="") as f:
+            for row in csv.DictReader(f):
+                stats["rows"] += 1
+                match = HANDLE_RE.search(row.get("url") or "")
+                if not match:
+                    continue
+                stats["valid_handles"] += 1
+                batch.add(match.group(1).lower())
+                if len(batch) >= batch_size:
+                    flush()
+        if batch:
+            flush()
+        else:
+            progress(dict(stats))
+    finally:
+        if delete_after:
+            path.unlink(missing_ok=True)
+    return stats
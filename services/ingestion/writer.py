@@ -0,0 +1,143 @@
+"""Bulk writer for accounts found by the discovery pipelines."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from shared.db import dialect_insert, session_scope
+from shared.models import Account, Media
+
+WRITE_BATCH_SIZE = 1000
+
+
+def _insert_batch(session: Session, batch: list[tuple[str, str, dict | None]]) -> int:
+    now = datetime.utcnow()
+    values = [
+        {
+            "id": uuid.uuid4(),
+            "username": username,
+            "source": source,
+            "source_details": details,
+            "status": "DISCOVERED",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for username, source, details in batch
+    ]
+    dialect = session.get_bind().dialect
+    if dialect.name in ("postgresql", "sqlite") and dialect.insert_returning:
+        stmt = (
+            dialect_insert(session, Account)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=[Account.username])
+            .returning(Account.username)
+        )
+        return len(session.scalars(stmt).all())
+    # Fallback for databases (e.g. SQLite < 3.35) without INSERT ... RETURNING.
+    existing = set(
+        session.scalars(
+            select(Account.username).where(
+                Account.username.in_([v["username"] for v in values])
+            )
+        )
+    )
+    new = [v for v in values if v["username"] not in existing]
+    if new:
+        session.execute(insert(Account), new)
+    return len(new)
+
+
+def persist_discovered(
+    rows: Iterable[tuple[str, str, dict | None]],
+    batch_size: int = WRITE_BATCH_SIZE,
+) -> dict:
+    """Insert ``(username, source, details)`` rows, skipping known usernames.
+
+    Usernames are normalised to lower case and deduplicated in memory; the
+    first row seen for a username wins.
+    """
+    unique: dict[str, tuple[str, str, dict | None]] = {}
+    for username, source, details in rows:
+        username = username.strip().lower()
+        if username and username not in unique:
+            unique[username] = (username, source, details)
+    batch = list(unique.values())
+    inserted = 0
+    if batch:
+        with session_scope() as session:
+            for start in range(0, len(batch), batch_size):
+                inserted += _insert_batch(session, batch[start : start + batch_size])
+    return {
+        "inserted": inserted,
+        "duplicates": len(batch) - inserted,
+        "total": len(batch),
+    }
+
+
+def _insert_media_batch(session: Session, batch: list[dict]) -> None:
+    account_ids = dict(
+        session.execute(
+            select(Account.username, Account.id).where(
+                Account.username.in_({m["username"] for m in batch})
+            )
+        ).all()
+    )
+    values = [
+        {
+            "id": uuid.uuid4(),
+            "account_id": account_ids[m["username"]],
+            "ig_media_id": m["ig_media_id"],
+            "caption": m.get("caption"),
+            "media_type": m.get("media_type"),
+            "permalink": m.get("permalink"),
+            "taken_at": m.get("taken_at"),
+        }
+        for m in batch
+        if m["username"] in account_ids
+    ]
+    if not values:
+        return
+    stmt = dialect_insert(session, Media).values(values)
+    stmt = stmt.on_conflict_do_nothing(
+        index_elements=[Media.account_id, Media.ig_media_id]
+    )
+    session.execute(stmt)
+    latest = (
+        select(func.max(Media.taken_at))
+        .where(Media.account_id == Account.id)
+        .scalar_subquery()
+    )
+    session.execute(
+        update(Account)
+        .where(Account.id.in_({v["account_id"] for v in values}))
+        # Keep updated_at: it drives the enrichment refresh schedule.
+        .values(last_post_at=latest, updated_at=Account.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def persist_media(media: Iterable[dict], batch_size: int = WRITE_BATCH_SIZE) -> int:
+    """Store media for known accounts and refresh their ``last_post_at``.
+
+    Each item needs ``username`` and ``ig_media_id``; ``caption``,
+    ``media_type``, ``permalink`` and ``taken_at`` are optional. Items of
+    unknown accounts are dropped. Returns the number of unique items.
+    """
+    unique: dict[tuple[str, str], dict] = {}
+    for item in media:
+        username = (item.get("username") or "").strip().lower()
+        if username and item.get("ig_media_id"):
+            unique.setdefault(
+                (username, item["ig_media_id"]), {**item, "username": username}
+            )
+    batch = list(unique.values())
+    if batch:
+        with session_scope() as session:
+            for start in range(0, len(batch), batch_size):
+                _insert_media_batch(session, batch[start : start + batch_size])
+    return len(batch)
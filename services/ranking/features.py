@@ -2,37 +2,101 @@
 
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Dict
+import re
+from datetime import datetime, timezone
+from typing import Dict, Sequence
+
+import numpy as np
 
 from shared.models import Account
 
 KEYWORDS = ["bakery", "boulangerie", "patisserie", "bakkerij"]
 CITY_KEYWORDS = ["amsterdam", "jordaan", "de pijp", "oud-west"]
 
+KEYWORD_RE = re.compile("|".join(re.escape(k) for k in KEYWORDS))
+CITY_KEYWORD_RE = re.compile("|".join(re.escape(k) for k in CITY_KEYWORDS))
+_KEYWORD_SET = frozenset(KEYWORDS)
+
+# Column order of build_feature_matrix. Bump FEATURE_VERSION whenever it
+# changes so trained model artifacts can detect a mismatch.
+FEATURE_VERSION = 1
+FEATURE_COLUMNS = (
+    "bio_keyword",
+    "category_keyword",
+    "website_nl",
+    "followers_bucket",
+    "media_count",
+    "days_since_post",
+    "source_hashtag",
+    "source_maps",
+    "city_keyword",
+)
+COLUMN_INDEX = {name: i for i, name in enumerate(FEATURE_COLUMNS)}
+
+
+def _days_since(ts: datetime | None, now: datetime) -> float:
+    if ts is None:
+        return 999.0
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return float((now - ts).days)
+
 
 def build_features(account: Account) -> Dict[str, float]:
     feats: Dict[str, float] = {}
     bio = (account.bio or "").lower()
-    feats["bio_keyword"] = 1.0 if any(k in bio for k in KEYWORDS) else 0.0
+    metrics = account.metrics_json or {}
+    feats["bio_keyword"] = 1.0 if KEYWORD_RE.search(bio) else 0.0
     feats["category_keyword"] = (
-        1.0 if (account.category or "").lower() in KEYWORDS else 0.0
+        1.0 if (account.category or "").lower() in _KEYWORD_SET else 0.0
     )
     feats["website_nl"] = (
         1.0 if account.website and account.website.endswith(".nl") else 0.0
     )
-    followers = (account.metrics_json or {}).get("followers_count", 0) or 0
+    followers = metrics.get("followers_count", 0) or 0
     feats["followers_bucket"] = min(followers / 1000.0, 10.0)
-    feats["media_count"] = float(
-        (account.metrics_json or {}).get("media_count", 0) or 0
-    )
-    if account.last_post_at:
-        delta = datetime.utcnow() - account.last_post_at
-        feats["days_since_post"] = delta.days
-    else:
-        feats["days_since_post"] = 999.0
+    feats["media_count"] = float(metrics.get("media_count", 0) or 0)
+    feats["days_since_post"] = _days_since(account.last_post_at, datetime.utcnow())
     src = (account.source or "").lower()
     feats["source_hashtag"] = 1.0 if src == "hashtag" else 0.0
     feats["source_maps"] = 1.0 if src == "maps" else 0.0
-    feats["city_keyword"] = 1.0 if any(k in bio for k in CITY_KEYWORDS) else 0.0
+    feats["city_keyword"] = 1.0 if CITY_KEYWORD_RE.search(bio) else 0.0
     return feats
+
+
+def build_feature_matrix(
+    accounts: Sequence[Account], now: datetime | None = None
+) -> np.ndarray:
+    """Build a float32 matrix with one row per account in FEATURE_COLUMNS order."""
+    now = now or datetime.utcnow()
+    n = len(accounts)
+    bios = [(a.bio or "").lower() for a in accounts]
+    metrics = [a.metrics_json or {} for a in accounts]
+    sources = [(a.source or "").lower() for a in accounts]
+    websites = [a.website or "" for a in accounts]
+
+    def column(values) -> np.ndarray:
+        return np.fromiter(values, dtype=np.float32, count=n)
+
+    followers = column(m.get("followers_count", 0) or 0 for m in metrics)
+    matrix = np.empty((n, len(FEATURE_COLUMNS)), dtype=np.float32)
+    matrix[:, COLUMN_INDEX["bio_keyword"]] = column(
+        KEYWORD_RE.search(b) is not None for b in bios
+    )
+    matrix[:, COLUMN_INDEX["category_keyword"]] = column(
+        (a.category or "").lower() in _KEYWORD_SET for a in accounts
+    )
+    matrix[:, COLUMN_INDEX["website_nl"]] = column(w.endswith(".nl") for w in websites)
+    matrix[:, COLUMN_INDEX["followers_bucket"]] = np.minimum(followers / 1000.0, 10.0)
+    matrix[:, COLUMN_INDEX["media_count"]] = column(
+        m.get("media_count", 0) or 0 for m in metrics
+    )
+    matrix[:, COLUMN_INDEX["days_since_post"]] = column(
+        _days_since(a.last_post_at, now) for a in accounts
+    )
+    matrix[:, COLUMN_INDEX["source_hashtag"]] = column(s == "hashtag" for s in sources)
+    matrix[:, COLUMN_INDEX["source_maps"]] = column(s == "maps" for s in sources)
+    matrix[:, COLUMN_INDEX["city_keyword"]] = column(
+        CITY_KEYWORD_RE.search(b) is not None for b in bios
+    )
+    return matrix
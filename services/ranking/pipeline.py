@@ -2,31 +2,119 @@
 
 from __future__ import annotations
 
+import uuid
+from datetime import datetime
+from typing import Iterable, Sequence
+
 from sqlalchemy import select
+from sqlalchemy.orm import Session
 
-from shared.db import session_scope
+from shared.db import dialect_insert, session_scope
 from shared.models import Account, Lead
 
-from .features import build_features
-from .scorers import RuleScorer
-
+from .features import build_feature_matrix
+from .registry import get_scorer, registry
+from .scorers import LogRegScorer, RuleScorer
 
-scorer = RuleScorer()
+BULK_CHUNK_SIZE = 1000
 
 
 def score_account(account_id: str) -> str:
+    scorer = get_scorer()
     with session_scope() as session:
         account = session.get(Account, account_id)
         if not account:
             raise ValueError("account not found")
-        features = build_features(account)
-        score, reason = scorer.score(features)
+        scores, reasons = scorer.score_batch(build_feature_matrix([account]))
         lead = session.scalar(select(Lead).where(Lead.account_id == account.id))
         if not lead:
             lead = Lead(account_id=account.id)
             session.add(lead)
-        lead.confidence = score
-        lead.reason = reason
-        lead.tags = ["rule"]
+        lead.confidence = float(scores[0])
+        lead.reason = reasons[0]
+        lead.tags = [scorer.name]
         lead.stage = lead.stage or "NEW"
         return str(lead.id)
+
+
+def score_accounts_bulk(
+    chunk_size: int = BULK_CHUNK_SIZE, model_version: str | None = None
+) -> dict:
+    """Rescore every account, one keyset-paginated chunk per transaction.
+
+    The scorer is fixed for the whole run. With ``model_version`` the model
+    is reloaded first and the run fails unless that version is the one
+    loaded, so a rescore queued right after training never uses the old one.
+    """
+    if model_version is not None:
+        registry.refresh()
+    scorer = registry.get()
+    artifact = scorer.artifact if isinstance(scorer, LogRegScorer) else None
+    if model_version is not None and (
+        artifact is None or artifact.version != model_version
+    ):
+        raise ValueError(f"model version {model_version} is not loaded")
+    scored = 0
+    chunks = 0
+    last_id: uuid.UUID | None = None
+    while True:
+        with session_scope() as session:
+            stmt = select(Account).order_by(Account.id).limit(chunk_size)
+            if last_id is not None:
+                stmt = stmt.where(Account.id > last_id)
+            accounts = session.scalars(stmt).all()
+            if not accounts:
+                break
+            upsert_leads(session, accounts, scorer)
+            last_id = accounts[-1].id
+        scored += len(accounts)
+        chunks += 1
+    return {"scored": scored, "chunks": chunks}
+
+
+def score_usernames(usernames: Iterable[str]) -> dict:
+    """Score the enriched accounts among ``usernames`` in one batch."""
+    with session_scope() as session:
+        accounts = session.scalars(
+            select(Account).where(
+                Account.username.in_(list(usernames)), Account.status == "ENRICHED"
+            )
+        ).all()
+        if accounts:
+            upsert_leads(session, accounts)
+    return {"scored": len(accounts)}
+
+
+def upsert_leads(
+    session: Session,
+    accounts: Sequence[Account],
+    scorer: RuleScorer | LogRegScorer | None = None,
+) -> None:
+    now = datetime.utcnow()
+    scorer = scorer or get_scorer()
+    scores, reasons = scorer.score_batch(build_feature_matrix(accounts, now))
+    rows = []
+    for account, score, reason in zip(accounts, scores.tolist(), reasons):
+        rows.append(
+            {
+                "id": uuid.uuid4(),
+                "account_id": account.id,
+                "confidence": score,
+                "reason": reason,
+                "tags": [scorer.name],
+                "stage": "NEW",
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+    stmt = dialect_insert(session, Lead).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Lead.account_id],
+        set_={
+            "confidence": stmt.excluded.confidence,
+            "reason": stmt.excluded.reason,
+            "tags": stmt.excluded.tags,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    session.execute(stmt)
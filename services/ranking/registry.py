@@ -0,0 +1,78 @@
+"""Process-wide registry of the active lead scorer."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+
+import structlog
+
+from .scorers import LogRegScorer, RuleScorer
+
+MODEL_PATH = Path(os.getenv("MODEL_PATH", "models/logreg.npz"))
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "30"))
+
+logger = structlog.get_logger(__name__)
+
+
+class ModelRegistry:
+    """Loads the model artifact once per process and swaps it when it changes.
+
+    Until an artifact exists the rule scorer is served. Call ``get()`` in a
+    parent process before forking so children share the loaded weights
+    copy-on-write instead of loading their own.
+    """
+
+    def __init__(
+        self,
+        model_path: Path = MODEL_PATH,
+        reload_interval: float = MODEL_RELOAD_INTERVAL,
+    ) -> None:
+        self.model_path = model_path
+        self.reload_interval = reload_interval
+        self._fallback = RuleScorer()
+        self._scorer: RuleScorer | LogRegScorer = self._fallback
+        self._stamp: tuple[int, int, int] | None = None
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> RuleScorer | LogRegScorer:
+        checked_at = self._checked_at
+        if checked_at is None or time.monotonic() - checked_at >= self.reload_interval:
+            self.refresh()
+        return self._scorer
+
+    def refresh(self) -> bool:
+        # Callers that lose the race keep serving the current scorer.
+        if not self._lock.acquire(blocking=self._checked_at is None):
+            return False
+        try:
+            self._checked_at = time.monotonic()
+            try:
+                st = self.model_path.stat()
+            except FileNotFoundError:
+                stamp = None
+            else:
+                # Every save renames a new file in, so the inode changes too.
+                stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if stamp == self._stamp:
+                return False
+            try:
+                scorer = LogRegScorer(self.model_path) if stamp else self._fallback
+            except (OSError, KeyError, ValueError):
+                # Keep serving the previous model; retried on the next check.
+                logger.exception("model_load_failed", path=str(self.model_path))
+                return False
+            self._scorer, self._stamp = scorer, stamp
+            return True
+        finally:
+            self._lock.release()
+
+
+registry = ModelRegistry()
+
+
+def get_scorer() -> RuleScorer | LogRegScorer:
+    return registry.get()
@@ -2,47 +2,143 @@
 
 from __future__ import annotations
 
-import pickle
+import os
+import uuid
 from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict
+from typing import ClassVar, Dict
 
 import numpy as np
-from sklearn.linear_model import LogisticRegression
+
+from .features import COLUMN_INDEX, FEATURE_COLUMNS, FEATURE_VERSION
+
+# (feature, cutoff, weight, reason): the rule fires when feature > cutoff.
+RULES: tuple[tuple[str, float, float, str], ...] = (
+    ("bio_keyword", 0.0, 0.4, "bio keyword"),
+    ("website_nl", 0.0, 0.3, "nl website"),
+    ("followers_bucket", 1.0, 0.2, "followers"),
+)
+
+
+@lru_cache(maxsize=None)
+def _reason_for_bits(bits: int) -> str:
+    return ", ".join(rule[3] for i, rule in enumerate(RULES) if bits >> i & 1)
 
 
 @dataclass
 class RuleScorer:
+    name: ClassVar[str] = "rule"
     threshold: float = 0.5
 
     def score(self, features: Dict[str, float]) -> tuple[float, str]:
         score = 0.0
         reasons: list[str] = []
-        if features.get("bio_keyword"):
-            score += 0.4
-            reasons.append("bio keyword")
-        if features.get("website_nl"):
-            score += 0.3
-            reasons.append("nl website")
-        if features.get("followers_bucket", 0) > 1:
-            score += 0.2
-            reasons.append("followers")
+        for name, cutoff, weight, reason in RULES:
+            if features.get(name, 0) > cutoff:
+                score += weight
+                reasons.append(reason)
         return score, ", ".join(reasons)
 
+    def score_batch(self, matrix: np.ndarray) -> tuple[np.ndarray, list[str | None]]:
+        """Score a FEATURE_COLUMNS matrix; reasons match ``score()`` per row."""
+        n = matrix.shape[0]
+        scores = np.zeros(n, dtype=np.float64)
+        bits = np.zeros(n, dtype=np.int64)
+        for i, (name, cutoff, weight, _) in enumerate(RULES):
+            fired = matrix[:, COLUMN_INDEX[name]] > cutoff
+            # Same accumulation order as score() so results match bit for bit.
+            scores += np.where(fired, weight, 0.0)
+            bits |= fired.astype(np.int64) << i
+        reasons: list[str | None] = [_reason_for_bits(b) for b in bits.tolist()]
+        return scores, reasons
+
+
+def new_model_version() -> str:
+    """Return a sortable version that is unique even within one second."""
+    return f"{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+@dataclass(frozen=True)
+class ModelArtifact:
+    """Weights of a linear model, stored as a pickle-free ``.npz`` file."""
+
+    coef: np.ndarray
+    intercept: float
+    columns: tuple[str, ...]
+    version: str
+    feature_version: int = FEATURE_VERSION
+
+    @classmethod
+    def load(cls, path: Path) -> "ModelArtifact":
+        with np.load(path, allow_pickle=False) as data:
+            artifact = cls(
+                coef=data["coef"].astype(np.float32),
+                intercept=float(data["intercept"]),
+                columns=tuple(str(c) for c in data["columns"]),
+                version=str(data["version"]),
+                feature_version=int(data["feature_version"]),
+            )
+        if artifact.feature_version != FEATURE_VERSION:
+            raise ValueError(
+                f"model was trained on feature version {artifact.feature_version},"
+                f" current is {FEATURE_VERSION}"
+            )
+        unknown = set(artifact.columns) - set(COLUMN_INDEX)
+        if unknown:
+            raise ValueError(f"model uses unknown feature columns: {sorted(unknown)}")
+        return artifact
+
+    def save(self, path: Path) -> None:
+        # Write next to the target and rename so readers never see a partial file.
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(
+                f,
+                coef=np.asarray(self.coef, dtype=np.float32),
+                intercept=np.float64(self.intercept),
+                columns=np.array(self.columns, dtype=str),
+                version=np.array(self.version),
+                feature_version=np.int64(self.feature_version),
+            )
+        os.replace(tmp, path)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.columns != FEATURE_COLUMNS:
+            X = X[:, [COLUMN_INDEX[c] for c in self.columns]]
+        z = X @ self.coef + self.intercept
+        return np.exp(-np.logaddexp(0.0, -z))
+
 
 class LogRegScorer:
-    def __init__(self, model_path: Path) -> None:
+    name = "logreg"
+
+    def __init__(self, model_path: Path, threshold: float = 0.5) -> None:
         self.model_path = model_path
-        if model_path.exists():
-            with model_path.open("rb") as f:
-                self.model = pickle.load(f)
-        else:
-            self.model = LogisticRegression()
+        self.threshold = threshold
+        self.artifact = ModelArtifact.load(model_path) if model_path.exists() else None
 
     def train(self, X: np.ndarray, y: np.ndarray) -> None:
-        self.model.fit(X, y)
-        with self.model_path.open("wb") as f:
-            pickle.dump(self.model, f)
+        # sklearn is only needed to fit; scoring runs on the exported weights.
+        from sklearn.linear_model import LogisticRegression
+
+        model = LogisticRegression().fit(X, y)
+        self.artifact = ModelArtifact(
+            coef=model.coef_[0].astype(np.float32),
+            intercept=float(model.intercept_[0]),
+            columns=FEATURE_COLUMNS,
+            version=new_model_version(),
+        )
+        self.artifact.save(self.model_path)
 
     def score(self, X: np.ndarray) -> np.ndarray:
-        return self.model.predict_proba(X)[:, 1]
+        if self.artifact is None:
+            raise ValueError(f"no trained model at {self.model_path}")
+        return self.artifact.predict(X)
+
+    def score_batch(self, matrix: np.ndarray) -> tuple[np.ndarray, list[str | None]]:
+        scores = self.score(matrix).astype(np.float64)
+        assert self.artifact is not None
+        reason = f"logreg {self.artifact.version}"
+        return scores, [reason] * len(scores)
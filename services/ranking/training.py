@@ -0,0 +1,165 @@
+"""Offline training of the lead scorer from reviewed leads."""
+
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+from sqlalchemy import select
+
+from shared.db import session_scope
+from shared.models import Account, Lead
+
+from .features import FEATURE_COLUMNS, build_feature_matrix
+from .registry import MODEL_PATH
+from .scorers import ModelArtifact, new_model_version
+
+POSITIVE_STAGES = ("VETTED", "CONTACTED")
+NEGATIVE_STAGES = ("REJECTED",)
+TRAIN_CHUNK_SIZE = 10_000
+HOLDOUT_PERCENT = 20
+
+
+def iter_labelled_chunks(
+    chunk_size: int = TRAIN_CHUNK_SIZE,
+) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Yield ``(X, y, bucket)`` per chunk of reviewed accounts.
+
+    Rows are streamed through a server-side cursor. ``bucket`` is a stable
+    0-99 value derived from the account id, used to split folds and holdout.
+    """
+    now = datetime.utcnow()
+    stmt = (
+        select(
+            Account.id,
+            Account.bio,
+            Account.category,
+            Account.website,
+            Account.metrics_json,
+            Account.last_post_at,
+            Account.source,
+            Lead.stage,
+        )
+        .join(Lead, Lead.account_id == Account.id)
+        .where(Lead.stage.in_(POSITIVE_STAGES + NEGATIVE_STAGES))
+        .execution_options(yield_per=chunk_size)
+    )
+    with session_scope() as session:
+        for rows in session.execute(stmt).partitions():
+            n = len(rows)
+            X = build_feature_matrix(rows, now)  # type: ignore[arg-type]
+            y = np.fromiter(
+                (r.stage in POSITIVE_STAGES for r in rows), dtype=np.int8, count=n
+            )
+            bucket = np.fromiter(
+                (r.id.int % 100 for r in rows), dtype=np.int16, count=n
+            )
+            yield X, y, bucket
+
+
+def _auc(y: np.ndarray, scores: np.ndarray) -> float | None:
+    from sklearn.metrics import roc_auc_score
+
+    if len(np.unique(y)) < 2:
+        return None
+    return float(roc_auc_score(y, scores))
+
+
+def train_model(
+    model_path: Path = MODEL_PATH,
+    chunk_size: int = TRAIN_CHUNK_SIZE,
+    folds: int = 5,
+    epochs: int = 3,
+) -> dict:
+    """Train a logistic model with SGD, keeping one chunk in memory at a time.
+
+    The data is streamed several times: once to fit feature scaling,
+    ``epochs`` times to train the final model and one model per
+    cross-validation fold, and once more to score the held-out rows.
+    """
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    started = time.perf_counter()
+    classes = np.array([0, 1])
+
+    def new_model() -> SGDClassifier:
+        return SGDClassifier(loss="log_loss", alpha=1e-4, random_state=0)
+
+    scaler = StandardScaler()
+    rows = 0
+    for X, _, bucket in iter_labelled_chunks(chunk_size):
+        train = bucket >= HOLDOUT_PERCENT
+        if train.any():
+            scaler.partial_fit(X[train])
+            rows += int(train.sum())
+    if not rows:
+        raise ValueError("no labelled leads to train on")
+
+    model = new_model()
+    fold_models = [new_model() for _ in range(folds)]
+    for _ in range(epochs):
+        for X, y, bucket in iter_labelled_chunks(chunk_size):
+            train = bucket >= HOLDOUT_PERCENT
+            if not train.any():
+                continue
+            Xs, ys, fold = scaler.transform(X[train]), y[train], bucket[train] % folds
+            model.partial_fit(Xs, ys, classes=classes)
+            for k, fold_model in enumerate(fold_models):
+                mask = fold != k
+                if mask.any():
+                    fold_model.partial_fit(Xs[mask], ys[mask], classes=classes)
+
+    cv_y: list[list[np.ndarray]] = [[] for _ in range(folds)]
+    cv_scores: list[list[np.ndarray]] = [[] for _ in range(folds)]
+    holdout_y: list[np.ndarray] = []
+    holdout_scores: list[np.ndarray] = []
+    for X, y, bucket in iter_labelled_chunks(chunk_size):
+        Xs = scaler.transform(X)
+        holdout = bucket < HOLDOUT_PERCENT
+        if holdout.any():
+            holdout_y.append(y[holdout])
+            holdout_scores.append(model.predict_proba(Xs[holdout])[:, 1])
+        fold = bucket % folds
+        for k, fold_model in enumerate(fold_models):
+            mask = ~holdout & (fold == k)
+            if mask.any() and hasattr(fold_model, "coef_"):
+                cv_y[k].append(y[mask])
+                cv_scores[k].append(fold_model.predict_proba(Xs[mask])[:, 1])
+
+    fold_aucs = [
+        auc
+        for k in range(folds)
+        if cv_y[k]
+        and (auc := _auc(np.concatenate(cv_y[k]), np.concatenate(cv_scores[k])))
+        is not None
+    ]
+    holdout_auc = (
+        _auc(np.concatenate(holdout_y), np.concatenate(holdout_scores))
+        if holdout_y
+        else None
+    )
+
+    # Fold the scaler into the weights so serving stays a plain dot product.
+    coef = model.coef_[0] / scaler.scale_
+    intercept = float(model.intercept_[0] - np.sum(coef * scaler.mean_))
+    artifact = ModelArtifact(
+        coef=coef.astype(np.float32),
+        intercept=intercept,
+        columns=FEATURE_COLUMNS,
+        version=new_model_version(),
+    )
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    artifact.save(model_path)
+    return {
+        "model_path": str(model_path),
+        "version": artifact.version,
+        "train_rows": rows,
+        "holdout_rows": int(sum(len(h) for h in holdout_y)),
+        "cv_auc": float(np.mean(fold_aucs)) if fold_aucs else None,
+        "holdout_auc": holdout_auc,
+        "train_seconds": round(time.perf_counter() - started, 3),
+    }
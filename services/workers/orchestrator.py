@@ -0,0 +1,243 @@
+"""Moves accounts through discover → enrich → score without an operator.
+
+Each tick claims newly discovered accounts and enqueues them for
+enrichment in BATCH_SIZE jobs, each chained to a scoring job. Batches are
+only cut when full unless the oldest account has waited ``max_wait``, and
+nothing is claimed while the enrich and rank queues are backed up.
+
+Every claim stamps a token on its accounts, and only that claim's jobs
+release them: whatever a job leaves behind (failed, stopped or deferred
+lookups) goes back to DISCOVERED when it ends. The token and its job ids
+are written to Redis before the claim commits, so a claim whose jobs were
+never enqueued or died without their callback is released on a later
+tick. Claiming pauses after auth errors and while the Graph rate limit
+is pushing lookups back. Ticks also flush the job ledger into the
+``jobs`` table.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, cast
+
+import redis
+import rq
+import structlog
+from rq import Callback
+from rq.job import Job, JobStatus
+from sqlalchemy import CursorResult, func, select, update
+
+from shared import job_ledger
+from shared.db import session_scope
+from shared.graph_client import BATCH_SIZE, GraphAPIError
+from shared.models import Account
+from shared.redis_client import get_queue, get_redis
+
+from .worker import enqueue_enrich_and_score
+
+ORCHESTRATE_INTERVAL = float(os.getenv("ORCHESTRATE_INTERVAL", "15"))
+ORCHESTRATE_MAX_WAIT = timedelta(seconds=int(os.getenv("ORCHESTRATE_MAX_WAIT", "120")))
+ORCHESTRATE_MAX_CLAIM = int(os.getenv("ORCHESTRATE_MAX_CLAIM", "1000"))
+# Jobs waiting in the enrich and rank queues before claiming pauses.
+ORCHESTRATE_MAX_QUEUE_DEPTH = int(os.getenv("ORCHESTRATE_MAX_QUEUE_DEPTH", "100"))
+# Seconds claiming pauses after an auth error, and at least after a retry.
+ORCHESTRATE_AUTH_PAUSE = int(os.getenv("ORCHESTRATE_AUTH_PAUSE", "900"))
+ORCHESTRATE_RETRY_PAUSE = int(os.getenv("ORCHESTRATE_RETRY_PAUSE", "60"))
+CLAIMED_STATUS = "ENRICH_QUEUED"
+# Claim token -> JSON list of the enrich job ids reserved for it.
+CLAIMS_KEY = "orchestrator:claims"
+PAUSE_KEY = "orchestrator:paused"
+ENDED_STATUSES = (
+    JobStatus.FINISHED,
+    JobStatus.FAILED,
+    JobStatus.STOPPED,
+    JobStatus.CANCELED,
+)
+
+logger = structlog.get_logger(__name__)
+
+
+def _naive_utc(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+
+def queue_depth() -> int:
+    return get_queue("enrich").count + get_queue("rank").count
+
+
+def claim_discovered(
+    limit: int,
+    max_wait: timedelta = ORCHESTRATE_MAX_WAIT,
+    now: datetime | None = None,
+    claim_id: str | None = None,
+) -> list[str]:
+    """Mark up to ``limit`` discovered accounts as queued; return usernames.
+
+    Only whole batches are claimed until the oldest account has waited
+    ``max_wait``, after which the remainder goes too. The accounts are
+    stamped with ``claim_id``.
+    """
+    now = now or datetime.utcnow()
+    with session_scope() as session:
+        waiting = (
+            select(Account.created_at)
+            .where(Account.status == "DISCOVERED")
+            .order_by(Account.created_at)
+            .limit(limit)
+            .subquery()
+        )
+        pending, oldest = session.execute(
+            select(func.count(), func.min(waiting.c.created_at))
+        ).one()
+        if not pending:
+            return []
+        if now - _naive_utc(oldest) < max_wait:
+            pending -= pending % BATCH_SIZE
+            if not pending:
+                return []
+        ids = (
+            select(Account.id)
+            .where(Account.status == "DISCOVERED")
+            .order_by(Account.created_at)
+            .limit(pending)
+            .with_for_update(skip_locked=True)
+        )
+        return list(
+            session.scalars(
+                update(Account)
+                .where(Account.id.in_(ids.scalar_subquery()))
+                .values(status=CLAIMED_STATUS, claim_id=claim_id, updated_at=now)
+                .returning(Account.username)
+                .execution_options(synchronize_session=False)
+            )
+        )
+
+
+def _release(claim_id: str, usernames: Iterable[str] | None = None) -> int:
+    stmt = update(Account).where(
+        Account.claim_id == claim_id, Account.status == CLAIMED_STATUS
+    )
+    if usernames is not None:
+        stmt = stmt.where(Account.username.in_(list(usernames)))
+    with session_scope() as session:
+        result = session.execute(
+            stmt.values(status="DISCOVERED", claim_id=None).execution_options(
+                synchronize_session=False
+            )
+        )
+        return cast(CursorResult, result).rowcount
+
+
+def pause_claiming(connection: redis.Redis, seconds: float) -> None:
+    # A shorter pause never cuts a longer one short.
+    if cast(int, connection.ttl(PAUSE_KEY)) < seconds:
+        connection.set(PAUSE_KEY, 1, ex=max(math.ceil(seconds), 1))
+
+
+def release_claims(job: rq.job.Job, connection: redis.Redis, *args) -> None:
+    """Job callback returning the accounts an enrich job left claimed.
+
+    Runs however the job ended; accounts it enriched have moved on already.
+    """
+    _release(job.meta["claim_id"], job.args[0])
+
+
+def enrich_succeeded(
+    job: rq.job.Job, connection: redis.Redis, result: dict | None, *args
+) -> None:
+    release_claims(job, connection)
+    if result and result.get("retry"):
+        # The released usernames would otherwise be claimed again next tick.
+        pause_claiming(
+            connection, max(result.get("retry_after") or 0, ORCHESTRATE_RETRY_PAUSE)
+        )
+
+
+def enrich_failed(
+    job: rq.job.Job, connection: redis.Redis, exc_type, exc_value, traceback
+) -> None:
+    release_claims(job, connection)
+    if isinstance(exc_value, GraphAPIError) and exc_value.kind == "auth":
+        logger.error("orchestrator_paused_on_auth_error", error=str(exc_value))
+        pause_claiming(connection, ORCHESTRATE_AUTH_PAUSE)
+
+
+def release_orphaned_claims(connection: redis.Redis) -> int:
+    """Release claims none of whose jobs are still queued or running.
+
+    Covers jobs that ended without their callback, e.g. because the worker
+    died, and claims whose jobs were never enqueued.
+    """
+    claims = cast(dict[bytes, bytes], connection.hgetall(CLAIMS_KEY))
+    released = 0
+    for claim_id, job_ids in claims.items():
+        jobs = Job.fetch_many(json.loads(job_ids), connection)
+        if any(
+            job is not None and job.get_status(refresh=False) not in ENDED_STATUSES
+            for job in jobs
+        ):
+            continue
+        released += _release(claim_id.decode())
+        connection.hdel(CLAIMS_KEY, claim_id)
+    return released
+
+
+def claim_and_enqueue(connection: redis.Redis, limit: int) -> list[str]:
+    """Claim up to ``limit`` accounts and enqueue them; return usernames."""
+    claim_id = uuid.uuid4().hex
+    job_ids = [uuid.uuid4().hex for _ in range(math.ceil(limit / BATCH_SIZE))]
+    # Recorded before the claim commits: if anything below fails, no job of
+    # this claim is alive and a later tick releases what it holds.
+    connection.hset(CLAIMS_KEY, claim_id, json.dumps(job_ids))
+    usernames = claim_discovered(limit, claim_id=claim_id)
+    if not usernames:
+        connection.hdel(CLAIMS_KEY, claim_id)
+        return []
+    enqueue_enrich_and_score(
+        usernames,
+        job_ids=job_ids,
+        meta={"claim_id": claim_id},
+        on_success=Callback(enrich_succeeded),
+        on_failure=Callback(enrich_failed),
+        on_stopped=Callback(release_claims),
+    )
+    return usernames
+
+
+def tick(
+    max_claim: int = ORCHESTRATE_MAX_CLAIM,
+    max_queue_depth: int = ORCHESTRATE_MAX_QUEUE_DEPTH,
+) -> dict:
+    connection = get_redis()
+    ledger_events = job_ledger.flush_all(connection)
+    released = release_orphaned_claims(connection)
+    depth = queue_depth()
+    paused = bool(connection.exists(PAUSE_KEY))
+    # Each queued job covers up to one batch, so cap claims by free slots.
+    limit = min(max_claim, max(max_queue_depth - depth, 0) * BATCH_SIZE)
+    usernames = claim_and_enqueue(connection, limit) if limit and not paused else []
+    stats = {
+        "ledger_events": ledger_events,
+        "released": released,
+        "claimed": len(usernames),
+        "jobs": math.ceil(len(usernames) / BATCH_SIZE),
+        "queue_depth": depth,
+        "paused": paused,
+    }
+    logger.info("orchestrator_tick", **stats)
+    return stats
+
+
+def run(interval: float = ORCHESTRATE_INTERVAL) -> None:
+    while True:
+        try:
+            tick()
+        except Exception:
+            # A database or Redis blip must not stop the pipeline for good.
+            logger.exception("orchestrator_tick_failed")
+        time.sleep(interval)
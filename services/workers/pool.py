@@ -0,0 +1,138 @@
+"""Supervisor running a fixed number of RQ worker processes per queue.
+
+Heavy imports, the scoring model and the database engine are set up once
+in the supervisor and inherited by every forked worker. I/O-bound queues
+run a ``SimpleWorker``, which executes jobs in the worker process itself
+instead of forking a work horse per job. The supervisor also flushes the
+job ledger, so job rows stay current without the orchestrator running.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.process import BaseProcess
+
+import numpy  # noqa: F401  (preloaded for the forked workers)
+import structlog
+
+from services.ranking.registry import registry
+from shared import job_ledger
+from shared.db import engine
+from shared.redis_client import get_queue, get_redis
+
+from .worker import SimpleWorker, Worker
+
+WORKER_CONCURRENCY = os.getenv("WORKER_CONCURRENCY", "discover=4,enrich=8,rank=2")
+# Queues whose jobs mostly wait on the network; see the module docstring.
+SIMPLE_QUEUES = frozenset({"discover", "enrich"})
+RESTART_DELAY = 1.0
+LEDGER_FLUSH_INTERVAL = float(os.getenv("LEDGER_FLUSH_INTERVAL", "5"))
+
+logger = structlog.get_logger(__name__)
+
+
+def parse_concurrency(spec: str) -> dict[str, int]:
+    """Parse ``"queue=count,..."`` into a mapping, e.g. ``{"rank": 2}``."""
+    concurrency: dict[str, int] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, sep, count = part.partition("=")
+        if not sep or not name.strip() or int(count) < 0:
+            raise ValueError(f"invalid worker concurrency {part!r}")
+        concurrency[name.strip()] = int(count)
+    return concurrency
+
+
+def preload() -> None:
+    """Load what every worker needs before forking."""
+    registry.get()
+    # Connecting once runs the dialect's first-connect setup in the parent.
+    with engine.connect():
+        pass
+
+
+def _work(queue_name: str) -> None:
+    # Connections opened by the parent must not be shared with children.
+    engine.dispose(close=False)
+    worker_class = SimpleWorker if queue_name in SIMPLE_QUEUES else Worker
+    worker_class([get_queue(queue_name)], connection=get_redis()).work()
+
+
+class WorkerPool:
+    def __init__(self, concurrency: dict[str, int]) -> None:
+        self.concurrency = concurrency
+        self._context = multiprocessing.get_context("fork")
+        self._procs: dict[BaseProcess, str] = {}
+        self._stopping = False
+
+    def _spawn(self, queue_name: str) -> None:
+        proc = self._context.Process(
+            target=_work, args=(queue_name,), name=f"rq-{queue_name}"
+        )
+        proc.start()
+        self._procs[proc] = queue_name
+
+    def start(self) -> None:
+        for queue_name, count in self.concurrency.items():
+            for _ in range(count):
+                self._spawn(queue_name)
+        logger.info("worker_pool_started", concurrency=self.concurrency)
+
+    def reap(self) -> None:
+        """Replace workers that exited unless the pool is stopping."""
+        for proc, queue_name in list(self._procs.items()):
+            if proc.is_alive():
+                continue
+            del self._procs[proc]
+            if not self._stopping:
+                logger.warning(
+                    "worker_restarted", queue=queue_name, exitcode=proc.exitcode
+                )
+                self._spawn(queue_name)
+
+    def flush_ledger(self) -> None:
+        try:
+            job_ledger.flush_all(get_redis())
+        except Exception:
+            # Events stay in Redis and go out with the next flush.
+            logger.exception("ledger_flush_failed")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        # rq workers treat SIGTERM as a warm shutdown: finish, then exit.
+        self._stopping = True
+        for proc in self._procs:
+            proc.terminate()
+        deadline = time.monotonic() + timeout
+        for proc in self._procs:
+            proc.join(max(deadline - time.monotonic(), 0))
+            if proc.is_alive():
+                proc.kill()
+        self._procs.clear()
+
+    def run(self) -> None:
+        def handle(signum, frame):
+            self._stopping = True
+
+        signal.signal(signal.SIGTERM, handle)
+        signal.signal(signal.SIGINT, handle)
+        self.start()
+        next_flush = time.monotonic() + LEDGER_FLUSH_INTERVAL
+        while not self._stopping:
+            time.sleep(RESTART_DELAY)
+            self.reap()
+            if time.monotonic() >= next_flush:
+                self.flush_ledger()
+                next_flush = time.monotonic() + LEDGER_FLUSH_INTERVAL
+        self.stop()
+        self.flush_ledger()
+
+
+def run_pool(spec: str = WORKER_CONCURRENCY) -> None:
+    preload()
+    WorkerPool(parse_concurrency(spec)).run()
+
+
+if __name__ == "__main__":
+    run_pool()
@@ -2,53 +2,213 @@
 
 from __future__ import annotations
 
-import os
+import uuid
+from collections import Counter
+from typing import Iterable
 
+import redis
 import rq
-from rq import Connection, Queue
-
-from services.enrichment.enrichment_service import enrich_account
-from services.ingestion.hashtag_service import discover_usernames
+from rq import Callback, Queue
+from rq.job import Dependency
+from rq.group import Group
+
+from services.enrichment.enrichment_service import (
+    enrich_account,
+    enrich_accounts,
+    recently_enriched,
+)
+from services.ingestion.hashtag_service import fan_out_discovery
 from services.ingestion.maps_pipeline import discover_from_maps
 from services.ingestion.search_pivot import import_csv
-from services.ranking.pipeline import score_account
-
-redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-connection = rq.Connection.from_url(redis_url)
+from services.ranking.pipeline import (
+    score_account,
+    score_accounts_bulk,
+    score_usernames,
+)
+from services.ranking.registry import registry
+from shared import job_ledger
+from shared.graph_client import BATCH_SIZE, batch_budget_seconds
+from shared.redis_client import get_queue, get_redis
+
+ENRICH_PENDING_TTL = 6 * 3600
+ENRICH_RESULT_TTL = 24 * 3600
+# An enrich job waits at most one full batch of rate-limit budget and hands
+# the rest back under ``retry``; the timeout leaves room for the lookups.
+ENRICH_MAX_WAIT = batch_budget_seconds()
+ENRICH_JOB_TIMEOUT = int(ENRICH_MAX_WAIT) + 300
 
 
 def enqueue_discover_hashtags(queries: list[str]) -> rq.job.Job:
-    with Connection(connection):
-        q = Queue("discover")
-        return q.enqueue(discover_usernames, queries)
+    return get_queue("discover").enqueue(fan_out_discovery, queries)
+
 
+def enqueue_import_csv(path: str, delete_after: bool = False) -> rq.job.Job:
+    return get_queue("discover").enqueue(
+        import_csv, path, delete_after=delete_after, job_timeout="6h"
+    )
 
-def enqueue_import_csv(path: str) -> rq.job.Job:
-    with Connection(connection):
-        q = Queue("discover")
-        return q.enqueue(import_csv, path)
+
+def fetch_job(job_id: str) -> rq.job.Job:
+    return rq.job.Job.fetch(job_id, connection=get_redis())
 
 
 def enqueue_discover_maps(category: str, city: str) -> rq.job.Job:
-    with Connection(connection):
-        q = Queue("discover")
-        return q.enqueue(discover_from_maps, category, city)
+    return get_queue("discover").enqueue(discover_from_maps, category, city)
 
 
 def enqueue_enrich(username: str) -> rq.job.Job:
-    with Connection(connection):
-        q = Queue("enrich")
-        return q.enqueue(enrich_account, username)
+    return get_queue("enrich").enqueue(enrich_account, username)
+
+
+def enqueue_enrich_and_score(
+    usernames: list[str],
+    group: Group | None = None,
+    job_ids: list[str] | None = None,
+    **options,
+) -> list[rq.job.Job]:
+    """Enqueue enrichment in BATCH_SIZE jobs, each followed by a rank job.
+
+    The rank job runs once its enrich job has ended, even if it failed, and
+    scores the accounts that came back enriched. ``job_ids`` fixes the ids
+    of the enrich jobs; ``options`` are passed to them.
+    """
+    options.setdefault("timeout", ENRICH_JOB_TIMEOUT)
+    chunks = [
+        usernames[i : i + BATCH_SIZE] for i in range(0, len(usernames), BATCH_SIZE)
+    ]
+    job_ids = job_ids or [uuid.uuid4().hex for _ in chunks]
+    enrich = [
+        Queue.prepare_data(
+            enrich_accounts,
+            (chunk,),
+            {"max_wait": ENRICH_MAX_WAIT},
+            job_id=job_id,
+            **options,
+        )
+        for chunk, job_id in zip(chunks, job_ids)
+    ]
+    queue = get_queue("enrich")
+    jobs = group.enqueue_many(queue, enrich) if group else queue.enqueue_many(enrich)
+    get_queue("rank").enqueue_many(
+        [
+            Queue.prepare_data(
+                score_usernames,
+                (chunk,),
+                depends_on=Dependency(jobs=[data.job_id], allow_failure=True),
+            )
+            for chunk, data in zip(chunks, enrich)
+        ]
+    )
+    return jobs
+
+
+def _pending_key(username: str) -> str:
+    return f"enrich:pending:{username}"
+
+
+def clear_pending(job: rq.job.Job, connection: redis.Redis, *args) -> None:
+    """Job callback releasing the usernames a finished enrich job held."""
+    connection.delete(*(_pending_key(u) for u in job.args[0]))
+
+
+def enqueue_enrich_bulk(usernames: Iterable[str]) -> dict:
+    """Enqueue enrichment and scoring for usernames under one batch id.
+
+    Usernames already waiting in an earlier batch, or whose enrichment was
+    committed recently enough to be skipped by the job anyway, are left out.
+    The checks are one query and one pipeline, and the enqueue is pipelined,
+    so the cost does not grow with the number of usernames posted.
+    """
+    usernames = list(dict.fromkeys(u.strip().lower() for u in usernames if u.strip()))
+    connection = get_redis()
+    fresh = recently_enriched(usernames)
+    candidates = [u for u in usernames if u not in fresh]
+    with connection.pipeline(transaction=False) as pipe:
+        for username in candidates:
+            pipe.set(_pending_key(username), 1, nx=True, ex=ENRICH_PENDING_TTL)
+        claimed = pipe.execute()
+    pending = [u for u, ok in zip(candidates, claimed) if ok]
+    batch_id = None
+    if pending:
+        group = Group(connection=connection)
+        enqueue_enrich_and_score(
+            pending,
+            group=group,
+            result_ttl=ENRICH_RESULT_TTL,
+            on_success=Callback(clear_pending),
+            on_failure=Callback(clear_pending),
+        )
+        batch_id = group.name
+    return {
+        "batch_id": batch_id,
+        "enqueued": len(pending),
+        "already_queued": len(candidates) - len(pending),
+        "recently_enriched": len(usernames) - len(candidates),
+    }
+
+
+def fetch_enrich_batch(batch_id: str) -> dict:
+    """Summarise the jobs of an enrich batch; raises NoSuchGroupError."""
+    jobs = Group.fetch(batch_id, get_redis()).get_jobs()
+    statuses = Counter(job.get_status() for job in jobs)
+    totals: Counter[str] = Counter()
+    retry: list[str] = []
+    for job in jobs:
+        result = job.return_value()
+        if result:
+            retry.extend(result.pop("retry", []))
+            result.pop("retry_after", None)
+            totals.update(result)
+    return {"jobs": dict(statuses), "result": dict(totals), "retry": retry}
 
 
 def enqueue_score(account_id: str) -> rq.job.Job:
-    with Connection(connection):
-        q = Queue("rank")
-        return q.enqueue(score_account, account_id)
+    return get_queue("rank").enqueue(score_account, account_id)
+
+
+def enqueue_score_bulk(chunk_size: int, model_version: str | None = None) -> rq.job.Job:
+    return get_queue("rank").enqueue(
+        score_accounts_bulk, chunk_size, model_version, job_timeout="6h"
+    )
+
+
+class LedgerWorkerMixin:
+    """Records job starts and outcomes in the job ledger."""
+
+    def prepare_job_execution(self, job, *args, **kwargs):
+        super().prepare_job_execution(job, *args, **kwargs)
+        attempt = job_ledger.next_attempt(self.connection, job)
+        job_ledger.record(self.connection, job, "started", attempt=attempt)
+
+    def handle_job_success(self, job, queue, *args, **kwargs):
+        super().handle_job_success(job, queue, *args, **kwargs)
+        job_ledger.record(self.connection, job, "finished")
+
+    def handle_job_failure(self, job, queue, started_job_registry=None, exc_string=""):
+        super().handle_job_failure(job, queue, started_job_registry, exc_string)
+        # Jobs set up for retry come back as queued rather than failed.
+        status = job.get_status(refresh=False)
+        if status in job_ledger.TERMINAL_STATUSES:
+            job_ledger.record(self.connection, job, status, exc_string)
+
+
+class Worker(LedgerWorkerMixin, rq.Worker):
+    def execute_job(self, job, queue):
+        # Check for a new model in the parent so each forked work horse
+        # inherits the loaded weights instead of loading them itself.
+        registry.get()
+        return super().execute_job(job, queue)
+
+
+class SimpleWorker(LedgerWorkerMixin, rq.SimpleWorker):
+    pass
 
 
 def run_worker() -> None:
-    with Connection(connection):
-        queues = [Queue("discover"), Queue("enrich"), Queue("rank")]
-        worker = rq.Worker(queues)
-        worker.work()
+    registry.get()
+    queues = [get_queue(name) for name in ("discover", "enrich", "rank")]
+    Worker(queues, connection=get_redis()).work()
+
+
+if __name__ == "__main__":
+    run_worker()
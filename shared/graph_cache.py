@@ -0,0 +1,74 @@
+"""Redis cache for business_discovery responses."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Iterable
+
+import redis
+from prometheus_client import Counter
+
+GRAPH_CACHE_TTL = int(os.getenv("GRAPH_CACHE_TTL", str(7 * 24 * 3600)))
+GRAPH_CACHE_NEGATIVE_TTL = int(os.getenv("GRAPH_CACHE_NEGATIVE_TTL", str(24 * 3600)))
+
+CACHE_HITS = Counter(
+    "graph_cache_hits_total", "business_discovery cache hits", ["result"]
+)
+CACHE_MISSES = Counter("graph_cache_misses_total", "business_discovery cache misses")
+
+
+def is_negative(data: dict | None) -> bool:
+    """Unknown accounts and non-professional accounts are negative results."""
+    return not data or not (
+        data.get("is_business_account") or data.get("is_professional_account")
+    )
+
+
+class ResponseCache:
+    """Caches lookups per username and field set, with separate TTLs for
+    positive and negative results."""
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        positive_ttl: int = GRAPH_CACHE_TTL,
+        negative_ttl: int = GRAPH_CACHE_NEGATIVE_TTL,
+        prefix: str = "graph:bd",
+    ) -> None:
+        self.client = client
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.prefix = prefix
+
+    def key(self, username: str, fields: Iterable[str]) -> str:
+        digest = hashlib.sha1(",".join(sorted(fields)).encode()).hexdigest()[:12]
+        return f"{self.prefix}:{digest}:{username.lower()}"
+
+    def get_many(
+        self, usernames: Iterable[str], fields: list[str]
+    ) -> dict[str, dict | None]:
+        """Return cached results; usernames missing from the dict are misses."""
+        usernames = list(usernames)
+        if not usernames:
+            return {}
+        values = self.client.mget([self.key(u, fields) for u in usernames])
+        hits: dict[str, dict | None] = {}
+        for username, raw in zip(usernames, values):
+            if raw is None:
+                CACHE_MISSES.inc()
+                continue
+            data = json.loads(raw)
+            CACHE_HITS.labels("negative" if is_negative(data) else "positive").inc()
+            hits[username] = data
+        return hits
+
+    def set_many(self, results: dict[str, dict | None], fields: list[str]) -> None:
+        if not results:
+            return
+        with self.client.pipeline(transaction=False) as pipe:
+            for username, data in results.items():
+                ttl = self.negative_ttl if is_negative(data) else self.positive_ttl
+                pipe.set(self.key(username, fields), json.dumps(data), ex=ttl)
+            pipe.execute()
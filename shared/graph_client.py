@@ -2,12 +2,19 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import os
 import random
 import time
-from typing import Any, Dict
+from typing import Any, Dict, Iterable
+from urllib.parse import urlencode
 
-import requests  # type: ignore[import]
+import httpx
+
+from .graph_cache import ResponseCache
+from .rate_limit import RateLimiter, parse_spec
+from .redis_client import get_redis
 
 BASE_URL = "https://graph.facebook.com/v20.0"
 
@@ -17,40 +24,154 @@ FB_USER_TOKEN = os.getenv("FB_USER_TOKEN")
 FB_PAGE_ID = os.getenv("FB_PAGE_ID")
 IG_USER_ID = os.getenv("IG_USER_ID")
 
+GRAPH_CONCURRENCY = int(os.getenv("GRAPH_CONCURRENCY", "8"))
+TIMEOUT = 10.0
+MAX_ATTEMPTS = 5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+GRAPH_RATE_LIMIT = os.getenv("GRAPH_RATE_LIMIT", "200/3600")
+GRAPH_RATE_BURST = int(os.getenv("GRAPH_RATE_BURST", "10"))
+BATCH_SIZE = 50  # Graph API limit for a single batch request
+THROTTLE_CODES = (4, 17, 32, 613)
+# Token and permission errors say nothing about the account being looked up.
+AUTH_CODES = (10, 102, 190)
+
 
 class GraphAPIError(Exception):
-    def __init__(self, code: int, message: str, subcode: int | None = None) -> None:
+    def __init__(
+        self,
+        code: int,
+        message: str,
+        subcode: int | None = None,
+        status: int | None = None,
+    ) -> None:
         super().__init__(message)
         self.code = code
         self.subcode = subcode
+        self.status = status
+
+    @property
+    def kind(self) -> str:
+        return _error_kind(self.status, self.code)
+
+
+def _error_kind(status: int | None, code: int | None) -> str:
+    """Classify a failed lookup as ``"transient"``, ``"auth"`` or ``"missing"``.
+
+    Transient failures are worth retrying. Auth failures come from our own
+    token or app permissions. Anything else means the account is unknown or
+    not accessible.
+    """
+    if status is None or status >= 500 or status == 429 or code in THROTTLE_CODES:
+        return "transient"
+    if code in AUTH_CODES or (code is not None and 200 <= code < 300):
+        return "auth"
+    return "missing"
+
+
+def _limits(concurrency: int) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+
+
+def _retry_wait(attempt: int) -> float:
+    return min(2.0**attempt, 60.0) + random.random()
+
+
+def _parse(resp: httpx.Response) -> Any:
+    if resp.status_code != 200:
+        data = resp.json().get("error", {})
+        raise GraphAPIError(
+            data.get("code", 0),
+            data.get("message", ""),
+            data.get("error_subcode"),
+            resp.status_code,
+        )
+    return resp.json()
+
+
+_client: httpx.Client | None = None
+
+
+def _get_client() -> httpx.Client:
+    # One pooled client per process keeps TCP/TLS connections alive.
+    global _client
+    if _client is None:
+        _client = httpx.Client(
+            base_url=BASE_URL, timeout=TIMEOUT, limits=_limits(GRAPH_CONCURRENCY)
+        )
+    return _client
+
+
+_rate_limiter: RateLimiter | None = None
 
 
-def _request(method: str, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
-    url = f"{BASE_URL}/{path}"
-    backoff = 1.0
-    for attempt in range(5):
-        resp = requests.request(method, url, params=params, timeout=10)
-        if resp.status_code in (429, 500, 502, 503, 504):
-            wait = backoff + random.random()
+def get_rate_limiter() -> RateLimiter | None:
+    # Only shared across workers when Redis is configured for the process.
+    global _rate_limiter
+    if _rate_limiter is None and os.getenv("REDIS_URL"):
+        _rate_limiter = RateLimiter.from_spec(
+            get_redis(), GRAPH_RATE_LIMIT, burst=GRAPH_RATE_BURST
+        )
+    return _rate_limiter
+
+
+def batch_budget_seconds() -> float:
+    """Seconds of rate-limit budget a full BATCH_SIZE lookup consumes."""
+    calls, seconds = parse_spec(GRAPH_RATE_LIMIT)
+    return BATCH_SIZE * seconds / calls
+
+
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    global _response_cache
+    if _response_cache is None and os.getenv("REDIS_URL"):
+        _response_cache = ResponseCache(get_redis())
+    return _response_cache
+
+
+def _after_response(
+    limiter: RateLimiter | None, resp: httpx.Response, attempt: int
+) -> float | None:
+    """Feed usage back to the limiter; return a backoff delay if retrying."""
+    if limiter:
+        limiter.record_usage(resp.headers)
+    if resp.status_code not in RETRY_STATUSES:
+        return None
+    wait = _retry_wait(attempt)
+    if limiter and resp.status_code == 429:
+        limiter.block(wait)
+    return wait
+
+
+def _request(
+    method: str,
+    path: str,
+    params: Dict[str, Any],
+    data: Dict[str, Any] | None = None,
+    cost: int = 1,
+    max_wait: float | None = None,
+) -> Any:
+    limiter = get_rate_limiter()
+    for attempt in range(MAX_ATTEMPTS):
+        if limiter:
+            limiter.acquire(cost, max_wait)
+        resp = _get_client().request(method, f"/{path}", params=params, data=data)
+        wait = _after_response(limiter, resp, attempt)
+        if wait is not None:
             time.sleep(wait)
-            backoff = min(backoff * 2, 60)
             continue
-        if resp.status_code != 200:
-            data = resp.json().get("error", {})
-            raise GraphAPIError(
-                data.get("code", 0), data.get("message", ""), data.get("error_subcode")
-            )
-        return resp.json()
-    raise GraphAPIError(429, "Too many retries")
+        return _parse(resp)
+    raise GraphAPIError(429, "Too many retries", status=429)
 
 
-def ig_hashtag_search(q: str) -> list[dict]:
-    params = {"q": q, "access_token": FB_USER_TOKEN}
-    data = _request("GET", "ig_hashtag_search", params)
-    return data.get("data", [])
+def _hashtag_search_params(q: str) -> Dict[str, Any]:
+    return {"q": q, "access_token": FB_USER_TOKEN}
 
 
-def hashtag_recent_media(hashtag_id: str, after: str | None = None) -> dict:
+def _recent_media_params(after: str | None) -> Dict[str, Any]:
     params = {
         "user_id": IG_USER_ID,
         "fields": "id,caption,permalink,media_type,timestamp,username",
@@ -58,18 +179,219 @@ def hashtag_recent_media(hashtag_id: str, after: str | None = None) -> dict:
     }
     if after:
         params["after"] = after
-    return _request("GET", f"{hashtag_id}/recent_media", params)
+    return params
 
 
-def business_discovery(username: str, fields: list[str]) -> dict | None:
-    params = {
+def _business_discovery_fields(username: str, fields: list[str]) -> str:
+    return f"business_discovery.username({username}){{{','.join(fields)}}}"
+
+
+def _business_discovery_params(username: str, fields: list[str]) -> Dict[str, Any]:
+    return {
         "access_token": FB_USER_TOKEN,
-        "fields": f"business_discovery.username({username}){{{','.join(fields)}}}",
+        "fields": _business_discovery_fields(username, fields),
     }
+
+
+def ig_hashtag_search(q: str) -> list[dict]:
+    data = _request("GET", "ig_hashtag_search", _hashtag_search_params(q))
+    return data.get("data", [])
+
+
+def hashtag_recent_media(hashtag_id: str, after: str | None = None) -> dict:
+    return _request("GET", f"{hashtag_id}/recent_media", _recent_media_params(after))
+
+
+def business_discovery(username: str, fields: list[str]) -> dict | None:
+    """Look up one username; ``None`` if it is unknown or inaccessible.
+
+    Transient and auth failures raise ``GraphAPIError`` and are not cached.
+    """
+    cache = get_response_cache()
+    if cache:
+        cached = cache.get_many([username], fields)
+        if username in cached:
+            return cached[username]
+    params = _business_discovery_params(username, fields)
     try:
         data = _request("GET", IG_USER_ID or "", params)
     except GraphAPIError as exc:
-        if exc.code == 190:  # invalid token etc.
-            return None
-        raise
-    return data.get("business_discovery")
+        if exc.kind != "missing":
+            raise
+        data = {}
+    result = data.get("business_discovery")
+    if cache:
+        cache.set_many({username: result}, fields)
+    return result
+
+
+def business_discovery_batch(
+    usernames: Iterable[str], fields: list[str], max_wait: float | None = None
+) -> dict[str, dict | None]:
+    """Look up to BATCH_SIZE usernames with a single Graph batch request.
+
+    Unknown or inaccessible accounts map to ``None``. Lookups that failed
+    transiently (throttling, server errors) are left out of the result so
+    callers can retry them. Cached usernames are not requested again. If any
+    lookup failed on our own token or permissions, the other answers are
+    cached and ``GraphAPIError`` is raised.
+    Raises ``RateLimitExceeded`` if the rate limiter would make the request
+    wait longer than ``max_wait`` seconds.
+    """
+    usernames = list(usernames)
+    if len(usernames) > BATCH_SIZE:
+        raise ValueError(f"at most {BATCH_SIZE} usernames per batch")
+    cache = get_response_cache()
+    cached = cache.get_many(usernames, fields) if cache else {}
+    usernames = [u for u in usernames if u not in cached]
+    if not usernames:
+        return cached
+    batch = [
+        {
+            "method": "GET",
+            "relative_url": f"{IG_USER_ID}?"
+            + urlencode({"fields": _business_discovery_fields(u, fields)}),
+        }
+        for u in usernames
+    ]
+    items = _request(
+        "POST",
+        "",
+        {"access_token": FB_USER_TOKEN},
+        data={"batch": json.dumps(batch), "include_headers": "false"},
+        cost=len(usernames),
+        max_wait=max_wait,
+    )
+    results: dict[str, dict | None] = {}
+    auth_error: GraphAPIError | None = None
+    for username, item in zip(usernames, items):
+        if not item:
+            continue
+        status = item.get("code")
+        body = json.loads(item.get("body") or "{}")
+        if status == 200:
+            results[username] = body.get("business_discovery")
+            continue
+        error = body.get("error", {})
+        kind = _error_kind(status, error.get("code"))
+        if kind == "missing":
+            results[username] = None
+        elif kind == "auth":
+            auth_error = GraphAPIError(
+                error.get("code", 0),
+                error.get("message", ""),
+                error.get("error_subcode"),
+                status,
+            )
+    if cache:
+        cache.set_many(results, fields)
+    if auth_error:
+        raise auth_error
+    return {**cached, **results}
+
+
+class AsyncGraphClient:
+    """Async client with a persistent connection pool and bounded concurrency."""
+
+    def __init__(
+        self,
+        concurrency: int = GRAPH_CONCURRENCY,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._client = httpx.AsyncClient(
+            base_url=BASE_URL,
+            timeout=TIMEOUT,
+            limits=_limits(concurrency),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self) -> "AsyncGraphClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def request(
+        self, method: str, path: str, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        limiter = get_rate_limiter()
+        for attempt in range(MAX_ATTEMPTS):
+            async with self._semaphore:
+                if limiter:
+                    await asyncio.sleep(await asyncio.to_thread(limiter.reserve))
+                resp = await self._client.request(method, f"/{path}", params=params)
+            wait = (
+                await asyncio.to_thread(_after_response, limiter, resp, attempt)
+                if limiter
+                else _after_response(None, resp, attempt)
+            )
+            if wait is not None:
+                await asyncio.sleep(wait)
+                continue
+            return _parse(resp)
+        raise GraphAPIError(429, "Too many retries", status=429)
+
+    async def ig_hashtag_search(self, q: str) -> list[dict]:
+        data = await self.request("GET", "ig_hashtag_search", _hashtag_search_params(q))
+        return data.get("data", [])
+
+    async def hashtag_recent_media(
+        self, hashtag_id: str, after: str | None = None
+    ) -> dict:
+        return await self.request(
+            "GET", f"{hashtag_id}/recent_media", _recent_media_params(after)
+        )
+
+    async def business_discovery(self, username: str, fields: list[str]) -> dict | None:
+        cache = get_response_cache()
+        if cache:
+            cached = await asyncio.to_thread(cache.get_many, [username], fields)
+            if username in cached:
+                return cached[username]
+        params = _business_discovery_params(username, fields)
+        try:
+            data = await self.request("GET", IG_USER_ID or "", params)
+        except GraphAPIError as exc:
+            if exc.kind != "missing":
+                raise
+            data = {}
+        result = data.get("business_discovery")
+        if cache:
+            await asyncio.to_thread(cache.set_many, {username: result}, fields)
+        return result
+
+    async def ig_hashtag_search_many(self, queries: Iterable[str]) -> list[list[dict]]:
+        return list(await asyncio.gather(*map(self.ig_hashtag_search, queries)))
+
+    async def business_discovery_many(
+        self, usernames: Iterable[str], fields: list[str]
+    ) -> dict[str, dict | None]:
+        usernames = list(usernames)
+        results = await asyncio.gather(
+            *(self.business_discovery(u, fields) for u in usernames)
+        )
+        return dict(zip(usernames, results))
+
+
+def ig_hashtag_search_many(
+    queries: Iterable[str], concurrency: int = GRAPH_CONCURRENCY
+) -> list[list[dict]]:
+    async def run() -> list[list[dict]]:
+        async with AsyncGraphClient(concurrency) as client:
+            return await client.ig_hashtag_search_many(queries)
+
+    return asyncio.run(run())
+
+
+def business_discovery_many(
+    usernames: Iterable[str], fields: list[str], concurrency: int = GRAPH_CONCURRENCY
+) -> dict[str, dict | None]:
+    async def run() -> dict[str, dict | None]:
+        async with AsyncGraphClient(concurrency) as client:
+            return await client.business_discovery_many(usernames, fields)
+
+    return asyncio.run(run())
@@ -0,0 +1,184 @@
+"""Job lifecycle ledger.
+
+Queue and worker hooks push small JSON events onto a Redis list, which
+costs one list push per transition and never touches the database on the
+job path. ``flush`` later drains the list in batches and upserts one row
+per job into the ``jobs`` table. Events are only trimmed off the list once
+their batch is committed, so a failed flush is retried rather than lost.
+Replaying a batch is harmless: ``started`` events carry the attempt number
+counted on the job itself and the upsert keeps the highest one seen.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime
+from typing import Any, cast
+
+import redis
+from rq import Queue
+from rq.job import Job as RQJob
+from sqlalchemy import case, func
+
+from .db import dialect_insert, session_scope
+from .models import Job
+
+LEDGER_KEY = "jobs:ledger"
+LEDGER_FLUSH_SIZE = 1000
+# Held while flushing so the orchestrator and worker pool take turns.
+LEDGER_LOCK_KEY = "jobs:ledger:lock"
+LEDGER_LOCK_TIMEOUT = 60
+TERMINAL_STATUSES = ("finished", "failed", "stopped", "canceled")
+MAX_ERROR_LENGTH = 4000
+# Field on the RQ job hash counting how often a worker has started the job.
+ATTEMPT_FIELD = "ledger_attempts"
+
+
+def next_attempt(client: redis.Redis, job: RQJob) -> int:
+    """Count a start of ``job`` and return its attempt number."""
+    return int(client.hincrby(job.key, ATTEMPT_FIELD, 1))
+
+
+def record(
+    client: Any,
+    job: RQJob,
+    status: str,
+    error: str | None = None,
+    attempt: int | None = None,
+) -> None:
+    """Push a lifecycle event; ``client`` may be a connection or pipeline."""
+    event = {
+        "id": job.id,
+        "type": (job.func_name or "").rsplit(".", 1)[-1],
+        "queue": job.origin,
+        "status": status,
+        "at": datetime.utcnow().isoformat(),
+        "error": error[-MAX_ERROR_LENGTH:] if error else None,
+        "attempt": attempt,
+    }
+    client.lpush(LEDGER_KEY, json.dumps(event))
+
+
+class LedgerQueue(Queue):
+    """Queue recording a ``queued`` event whenever a job is put on it."""
+
+    def _enqueue_job(
+        self,
+        job: RQJob,
+        pipeline: Any = None,
+        at_front: bool = False,
+        unique: bool = False,
+    ) -> RQJob:
+        job = super()._enqueue_job(
+            job, pipeline=pipeline, at_front=at_front, unique=unique
+        )
+        # Rides along in the caller's pipeline when there is one.
+        record(pipeline if pipeline is not None else self.connection, job, "queued")
+        return job
+
+
+def _collapse(events: list[bytes]) -> list[dict]:
+    rows: dict[uuid.UUID, dict] = {}
+    for raw in events:
+        event = json.loads(raw)
+        try:
+            job_id = uuid.UUID(event["id"])
+        except ValueError:
+            continue  # custom non-UUID job ids are not tracked
+        at = datetime.fromisoformat(event["at"])
+        row = rows.setdefault(
+            job_id,
+            {
+                "id": job_id,
+                "attempts": 0,
+                "started_at": None,
+                "created_at": at,
+            },
+        )
+        status = event["status"]
+        row.update(
+            type=event["type"],
+            payload_json={"queue": event["queue"]},
+            status=status,
+            error=event["error"],
+            finished_at=at if status in TERMINAL_STATUSES else None,
+            updated_at=at,
+        )
+        if status == "started":
+            row["attempts"] = max(row["attempts"], event.get("attempt") or 1)
+            row["started_at"] = at
+    return list(rows.values())
+
+
+def _upsert(rows: list[dict]) -> None:
+    with session_scope() as session:
+        stmt = dialect_insert(session, Job).values(rows)
+        excluded = stmt.excluded
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Job.id],
+                set_={
+                    "type": excluded.type,
+                    "payload_json": excluded.payload_json,
+                    "status": excluded.status,
+                    "attempts": case(
+                        (excluded.attempts > Job.attempts, excluded.attempts),
+                        else_=Job.attempts,
+                    ),
+                    "error": excluded.error,
+                    "started_at": func.coalesce(excluded.started_at, Job.started_at),
+                    "finished_at": excluded.finished_at,
+                    "updated_at": excluded.updated_at,
+                },
+            )
+        )
+
+
+def _trim(client: redis.Redis, token: bytes, count: int) -> bool:
+    """Drop ``count`` flushed events, but only while still holding the lock."""
+    with client.pipeline() as pipe:
+        try:
+            pipe.watch(LEDGER_LOCK_KEY)
+            if pipe.get(LEDGER_LOCK_KEY) != token:
+                return False
+            pipe.multi()
+            pipe.ltrim(LEDGER_KEY, 0, -count - 1)
+            pipe.execute()
+        except redis.WatchError:
+            return False
+    return True
+
+
+def flush(client: redis.Redis, batch_size: int = LEDGER_FLUSH_SIZE) -> int:
+    """Move up to ``batch_size`` events into ``jobs``; return how many.
+
+    Returns 0 without reading anything while another process is flushing.
+    """
+    token = uuid.uuid4().hex.encode()
+    if not client.set(LEDGER_LOCK_KEY, token, nx=True, ex=LEDGER_LOCK_TIMEOUT):
+        return 0
+    try:
+        # Events are pushed on the left, so the oldest are at the right end.
+        events = cast(list[bytes], client.lrange(LEDGER_KEY, -batch_size, -1))
+        if not events:
+            return 0
+        rows = _collapse(events[::-1])
+        if rows:
+            _upsert(rows)
+        if not _trim(client, token, len(events)):
+            return 0  # lock expired; whoever holds it now replays the batch
+        return len(events)
+    finally:
+        if client.get(LEDGER_LOCK_KEY) == token:
+            client.delete(LEDGER_LOCK_KEY)
+
+
+def flush_all(client: redis.Redis, batch_size: int = LEDGER_FLUSH_SIZE) -> int:
+    """Flush until a batch comes back short of ``batch_size``."""
+    total = 0
+    while True:
+        flushed = flush(client, batch_size)
+        total += flushed
+        if flushed < batch_size:
+            return total
@@ -11,11 +11,13 @@ from sqlalchemy import (
     CheckConstraint,
     DateTime,
     ForeignKey,
+    Index,
     JSON,
     Numeric,
     String,
     Text,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -42,6 +44,8 @@ class Account(Base):
     source: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     source_details: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
     status: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Orchestrator claim that queued the account; see services.workers.orchestrator.
+    claim_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=datetime.utcnow
     )
@@ -52,6 +56,11 @@ class Account(Base):
     media: Mapped[list["Media"]] = relationship(back_populates="account")
     leads: Mapped[list["Lead"]] = relationship(back_populates="account")
 
+    __table_args__ = (
+        Index("ix_accounts_source_id", "source", "id", postgresql_include=["username"]),
+        Index("ix_accounts_status_created_at", "status", "created_at"),
+    )
+
 
 class Lead(Base):
     __tablename__ = "leads"
@@ -60,7 +69,7 @@ class Lead(Base):
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
     account_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("accounts.id")
+        UUID(as_uuid=True), ForeignKey("accounts.id"), unique=True
     )
     confidence: Mapped[Optional[float]] = mapped_column(Numeric(3, 2))
     reason: Mapped[Optional[str]] = mapped_column(Text)
@@ -81,6 +90,14 @@ class Lead(Base):
 
     __table_args__ = (
         CheckConstraint("stage IN ('NEW','VETTED','REJECTED','CONTACTED')"),
+        # Serves the /leads sort and keyset seek without touching the heap
+        # for the join key.
+        Index(
+            "ix_leads_confidence_id",
+            text("confidence DESC"),
+            text("id DESC"),
+            postgresql_include=["account_id"],
+        ),
     )
 
 
@@ -116,6 +133,8 @@ class Job(Base):
     attempts: Mapped[int] = mapped_column(default=0)
     error: Mapped[Optional[str]] = mapped_column(Text)
     scheduled_for: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=datetime.utcnow
     )
@@ -123,6 +142,12 @@ class Job(Base):
         DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
+    __table_args__ = (
+        Index("ix_jobs_created_at_id", "created_at", "id"),
+        Index("ix_jobs_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_jobs_type_created_at_id", "type", "created_at", "id"),
+    )
+
 
 class Audit(Base):
     __tablename__ = "audit"
@@ -137,3 +162,14 @@ class Audit(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=datetime.utcnow
     )
+
+
+class HashtagCursor(Base):
+    __tablename__ = "hashtag_cursors"
+
+    hashtag_id: Mapped[str] = mapped_column(String, primary_key=True)
+    last_media_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_media_id: Mapped[Optional[str]] = mapped_column(String)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+    )
@@ -0,0 +1,134 @@
+"""Redis-backed rate limiter shared by every process calling the Graph API."""
+
+from __future__ import annotations
+
+import json
+import time
+from typing import Mapping
+
+import redis
+
+
+def parse_usage(headers: Mapping[str, str]) -> tuple[float, float]:
+    """Return ``(usage_percent, seconds_until_access)`` from Graph usage headers."""
+    usage = 0.0
+    regain = 0.0
+    app = headers.get("x-app-usage")
+    if app:
+        try:
+            usage = max(float(v) for v in json.loads(app).values())
+        except (TypeError, ValueError):
+            pass
+    buc = headers.get("x-business-use-case-usage")
+    if buc:
+        try:
+            entries = [e for items in json.loads(buc).values() for e in items]
+        except (AttributeError, TypeError, ValueError):
+            entries = []
+        for entry in entries:
+            for key in ("call_count", "total_cputime", "total_time"):
+                usage = max(usage, float(entry.get(key) or 0))
+            minutes = float(entry.get("estimated_time_to_regain_access") or 0)
+            regain = max(regain, minutes * 60)
+    return usage, regain
+
+
+def parse_spec(spec: str) -> tuple[float, float]:
+    """Return ``(calls, seconds)`` from a ``"<calls>/<seconds>"`` spec."""
+    calls, _, seconds = spec.partition("/")
+    return float(calls), float(seconds or 1)
+
+
+class RateLimitExceeded(Exception):
+    """The wait for a reservation is longer than the caller allows."""
+
+    def __init__(self, wait: float) -> None:
+        super().__init__(f"rate limit wait of {wait:.0f}s exceeds the allowed wait")
+        self.wait = wait
+
+
+class RateLimiter:
+    """Generic cell rate algorithm (GCRA) with the state kept in Redis.
+
+    ``reserve()`` books the next slot for the caller and returns how long to
+    wait before using it, so concurrent workers queue up behind a single
+    schedule instead of bursting. Reported usage above ``slow_down_at``
+    percent stretches the interval up to ``max_slowdown`` times, and an
+    announced lockout blocks every caller until access is regained. Callers
+    that cannot wait long pass ``max_wait`` and get ``RateLimitExceeded``
+    instead of a slot; nothing is booked for them.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        rate: float,
+        period: float,
+        burst: int = 1,
+        key: str = "ratelimit:graph",
+        slow_down_at: float = 75.0,
+        max_slowdown: float = 10.0,
+    ) -> None:
+        self.client = client
+        self.interval = period / rate
+        self.burst = burst
+        self.slow_down_at = slow_down_at
+        self.max_slowdown = max_slowdown
+        self._tat_key = f"{key}:tat"
+        self._usage_key = f"{key}:usage"
+        self._blocked_key = f"{key}:blocked_until"
+
+    @classmethod
+    def from_spec(cls, client: redis.Redis, spec: str, **kwargs) -> "RateLimiter":
+        """Build from a ``"<calls>/<seconds>"`` spec such as ``"200/3600"``."""
+        return cls(client, *parse_spec(spec), **kwargs)
+
+    def _slowdown(self, usage: float) -> float:
+        if usage <= self.slow_down_at:
+            return 1.0
+        fraction = min((usage - self.slow_down_at) / (100 - self.slow_down_at), 1.0)
+        return 1.0 + fraction * (self.max_slowdown - 1.0)
+
+    def reserve(self, cost: int = 1, max_wait: float | None = None) -> float:
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self._tat_key)
+                    tat, usage, blocked = pipe.mget(
+                        self._tat_key, self._usage_key, self._blocked_key
+                    )
+                    now = time.time()
+                    interval = self.interval * self._slowdown(float(usage or 0))
+                    blocked_until = float(blocked or 0)
+                    new_tat = max(float(tat or 0), now, blocked_until) + interval * cost
+                    delay = max(
+                        0.0, new_tat - now - self.burst * interval, blocked_until - now
+                    )
+                    if max_wait is not None and delay > max_wait:
+                        raise RateLimitExceeded(delay)
+                    pipe.multi()
+                    pipe.set(self._tat_key, new_tat, px=int((new_tat - now) * 1000) + 1)
+                    pipe.execute()
+                    return delay
+                except redis.WatchError:
+                    continue
+
+    def acquire(self, cost: int = 1, max_wait: float | None = None) -> None:
+        delay = self.reserve(cost, max_wait)
+        if delay:
+            time.sleep(delay)
+
+    def record_usage(self, headers: Mapping[str, str]) -> None:
+        usage, regain = parse_usage(headers)
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self._usage_key, usage, ex=60)
+            if regain:
+                pipe.set(self._blocked_key, time.time() + regain, px=int(regain * 1000))
+            pipe.execute()
+
+    def block(self, seconds: float) -> None:
+        """Hold back every caller for ``seconds``, e.g. after a 429."""
+        until = time.time() + seconds
+        current = self.client.get(self._blocked_key)
+        if float(current or 0) < until:
+            self.client.set(self._blocked_key, until, px=int(seconds * 1000))
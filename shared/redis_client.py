@@ -0,0 +1,36 @@
+"""Shared Redis connection and RQ queues."""
+
+from __future__ import annotations
+
+import os
+
+import redis
+from rq import Queue
+
+from .job_ledger import LedgerQueue
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+_redis: redis.Redis | None = None
+
+
+def get_redis() -> redis.Redis:
+    # Created on first use; redis-py pools connections behind the client.
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(REDIS_URL)
+    return _redis
+
+
+_queues: dict[str, Queue] = {}
+
+
+def get_queue(name: str) -> Queue:
+    """Return the process-wide RQ queue ``name`` on the shared connection.
+
+    Jobs enqueued through it are recorded in the job ledger.
+    """
+    queue = _queues.get(name)
+    if queue is None:
+        queue = _queues[name] = LedgerQueue(name, connection=get_redis())
+    return queue
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from apps.api.export import EXPORT_COLUMNS
+from apps.api.main import API_KEY, app
+from shared.db import Base, engine, get_async_engine, session_scope
+from shared.models import Account, Job, Lead
+
+client = TestClient(app, headers={"x-api-key": API_KEY})
+
+
+def setup_module(module):
+    client.__enter__()
+    Base.metadata.create_all(engine)
+    with session_scope() as session:
+        for i, confidence in enumerate([0.9, 0.7, 0.7, 0.7, 0.5, 0.2]):
+            account = Account(
+                username=f"shop{i}", source="maps" if i % 2 else "hashtag"
+            )
+            session.add(Lead(account=account, confidence=confidence))
+
+
+def teardown_module(module):
+    client.__exit__(None, None, None)
+    Base.metadata.drop_all(engine)
+
+
+def _pages(path="/leads", **params):
+    cursor = None
+    while True:
+        resp = client.get(path, params={**params, "cursor": cursor})
+        assert resp.status_code == 200
+        yield resp.json()
+        cursor = resp.headers.get("x-next-cursor")
+        if not cursor:
+            return
+
+
+def test_leads_keyset_pages_are_ordered_and_disjoint():
+    pages = list(_pages(page_size=2, min_confidence=0.3))
+    leads = [lead for page in pages for lead in page]
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert len({lead["id"] for lead in leads}) == 5
+    assert [lead["confidence"] for lead in leads] == [0.9, 0.7, 0.7, 0.7, 0.5]
+
+
+def test_leads_filters_by_source():
+    leads = [lead for page in _pages(source="maps", page_size=2) for lead in page]
+    assert sorted(lead["username"] for lead in leads) == ["shop1", "shop3", "shop5"]
+
+
+def test_leads_deprecated_page_falls_back_to_offset():
+    cursor_pages = list(_pages(page_size=2))
+    for number, expected in enumerate(cursor_pages, start=1):
+        resp = client.get("/leads", params={"page": number, "page_size": 2})
+        assert resp.json() == expected
+
+
+def test_leads_rejects_bad_cursor():
+    assert client.get("/leads", params={"cursor": "nope"}).status_code == 400
+
+
+def test_leads_page_is_a_single_query():
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async_engine = get_async_engine().sync_engine
+    event.listen(async_engine, "before_cursor_execute", record)
+    try:
+        resp = client.get("/leads", params={"page_size": 100})
+    finally:
+        event.remove(async_engine, "before_cursor_execute", record)
+    assert resp.status_code == 200
+    assert len(resp.json()) == 6
+    assert len(statements) == 1
+
+
+def test_jobs_lists_recent_jobs():
+    with session_scope() as session:
+        session.add(Job(type="enrich", status="queued"))
+    resp = client.get("/jobs")
+    assert resp.status_code == 200
+    assert [(j["type"], j["status"]) for j in resp.json()] == [("enrich", "queued")]
+
+
+def test_jobs_filters_and_pages():
+    now = datetime.utcnow()
+    with session_scope() as session:
+        session.add_all(
+            Job(
+                type="score_usernames",
+                status="failed" if i % 2 else "finished",
+                created_at=now + timedelta(seconds=i),
+                started_at=now + timedelta(seconds=i),
+                finished_at=now + timedelta(seconds=i + 2),
+            )
+            for i in range(5)
+        )
+    pages = list(_pages("/jobs", type="score_usernames", page_size=2))
+    assert [len(p) for p in pages] == [2, 2, 1]
+    created = [job["created_at"] for page in pages for job in page]
+    assert created == sorted(created, reverse=True)
+    assert all(job["duration"] == 2.0 for page in pages for job in page)
+
+    failed = client.get("/jobs", params={"status": "failed", "type": "score_usernames"})
+    assert len(failed.json()) == 2
+
+
+def test_export_ndjson_streams_all_matching_leads():
+    resp = client.get("/leads/export", params={"min_confidence": 0.3})
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    leads = [json.loads(line) for line in resp.text.splitlines()]
+    assert sorted(lead["username"] for lead in leads) == [f"shop{i}" for i in range(5)]
+
+
+def test_export_csv_has_header_and_rows():
+    resp = client.get("/leads/export", params={"format": "csv", "source": "maps"})
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert sorted(r["username"] for r in rows) == ["shop1", "shop3", "shop5"]
+
+
+def test_export_parquet_round_trips():
+    pq = pytest.importorskip("pyarrow.parquet")
+    resp = client.get("/leads/export", params={"format": "parquet"})
+    table = pq.read_table(io.BytesIO(resp.content))
+    assert table.num_rows == 6
+    assert table.column_names == list(EXPORT_COLUMNS)
+
+
+def test_websearch_upload_is_copied_in_chunks(monkeypatch):
+    from apps.api import main
+
+    enqueued = {}
+
+    def enqueue(path, delete_after=False):
+        with open(path, "rb") as f:
+            enqueued["body"] = f.read()
+        os.remove(path)
+        return type("Job", (), {"id": "job-1"})
+
+    monkeypatch.setattr(main, "UPLOAD_CHUNK_SIZE", 4)
+    monkeypatch.setattr(main.worker, "enqueue_import_csv", enqueue)
+    body = b"url\nhttps://instagram.com/shop\n"
+    resp = client.post("/discover/websearch", files={"file": ("a.csv", body)})
+    assert resp.json() == {"status": "enqueued", "job_id": "job-1"}
+    assert enqueued["body"] == body
@@ -4,7 +4,8 @@ import sqlalchemy as sa
 
 from services.enrichment import enrichment_service
 from shared.db import Base, engine, session_scope
-from shared.models import Account
+from shared.models import Account, Audit
+from shared.rate_limit import RateLimitExceeded
 
 
 def setup_module(module):
@@ -27,3 +28,59 @@ def test_enrich_account(monkeypatch):
         acc = session.scalar(sa.select(Account).where(Account.username == "testbakery"))
         assert acc.name == "Test Bakery"
         assert acc.status == "ENRICHED"
+
+
+def test_enrich_accounts_batch(monkeypatch):
+    success = json.load(open(Path("tests/data/business_success.json")))[
+        "business_discovery"
+    ]
+    not_pro = json.load(open(Path("tests/data/business_not_pro.json")))[
+        "business_discovery"
+    ]
+    calls = []
+
+    def fake_batch(usernames, fields, max_wait=None):
+        calls.append(list(usernames))
+        return {"shop": success, "person": not_pro, "gone": None}
+
+    monkeypatch.setattr(
+        enrichment_service.graph_client, "business_discovery_batch", fake_batch
+    )
+    result = enrichment_service.enrich_accounts(
+        ["shop", "person", "gone", "flaky", "shop"]
+    )
+    assert calls == [["shop", "person", "gone", "flaky"]]
+    assert result == {
+        "enriched": 1,
+        "not_found": 1,
+        "not_pro_account": 1,
+        "skipped": 0,
+        "retry": ["flaky"],
+        "retry_after": None,
+    }
+    with session_scope() as session:
+        shop = session.scalar(sa.select(Account).where(Account.username == "shop"))
+        audits = session.scalars(
+            sa.select(Audit).where(Audit.entity_id == str(shop.id))
+        ).all()
+        assert len(audits) == 1
+
+    again = enrichment_service.enrich_accounts(["shop", "person", "gone"])
+    assert again["skipped"] == 3
+
+
+def test_enrich_accounts_defers_when_rate_limited(monkeypatch):
+    def fake_batch(usernames, fields, max_wait=None):
+        raise RateLimitExceeded(900.0)
+
+    monkeypatch.setattr(
+        enrichment_service.graph_client, "business_discovery_batch", fake_batch
+    )
+    result = enrichment_service.enrich_accounts(["later1", "later2"], max_wait=60)
+    assert result["retry"] == ["later1", "later2"]
+    assert result["retry_after"] == 900.0
+    with session_scope() as session:
+        statuses = session.scalars(
+            sa.select(Account.status).where(Account.username.in_(["later1", "later2"]))
+        ).all()
+        assert statuses == ["DISCOVERED", "DISCOVERED"]
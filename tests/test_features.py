@@ -2,7 +2,13 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta
 
-from services.ranking.features import build_features
+import numpy as np
+
+from services.ranking.features import (
+    FEATURE_COLUMNS,
+    build_feature_matrix,
+    build_features,
+)
 from shared.models import Account
 
 
@@ -19,3 +25,26 @@ def test_build_features():
     assert feats["bio_keyword"] == 1.0
     assert feats["website_nl"] == 1.0
     assert feats["followers_bucket"] == 1.2
+
+
+def test_build_feature_matrix_matches_dict_features():
+    accounts = [
+        Account(
+            username="u",
+            bio="Great bakery in Amsterdam",
+            category="Bakery",
+            website="https://test.nl",
+            metrics_json={"followers_count": 25000, "media_count": 5},
+            last_post_at=datetime.utcnow() - timedelta(days=10),
+            source="hashtag",
+        ),
+        Account(username="v", source="maps"),
+    ]
+    matrix = build_feature_matrix(accounts)
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (2, len(FEATURE_COLUMNS))
+    for row, acc in zip(matrix, accounts):
+        expected = build_features(acc)
+        np.testing.assert_allclose(
+            row, [expected[c] for c in FEATURE_COLUMNS], rtol=1e-6
+        )
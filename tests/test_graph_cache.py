@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+
+import fakeredis
+import httpx
+import pytest
+
+from shared import graph_client
+from shared.graph_cache import CACHE_HITS, CACHE_MISSES, ResponseCache
+
+
+def test_batch_lookups_are_served_from_cache(monkeypatch):
+    requested = []
+
+    def handler(request):
+        batch = json.loads(dict(httpx.QueryParams(request.content.decode()))["batch"])
+        requested.append(len(batch))
+        body = {"business_discovery": {"username": "shop", "is_business_account": True}}
+        return httpx.Response(
+            200,
+            json=[
+                {"code": 200, "body": json.dumps(body)},
+                {"code": 400, "body": json.dumps({"error": {"code": 110}})},
+            ][: len(batch)],
+        )
+
+    cache = ResponseCache(fakeredis.FakeRedis(), positive_ttl=100, negative_ttl=10)
+    monkeypatch.setattr(graph_client, "_response_cache", cache)
+    monkeypatch.setattr(
+        graph_client,
+        "_client",
+        httpx.Client(
+            base_url=graph_client.BASE_URL, transport=httpx.MockTransport(handler)
+        ),
+    )
+    hits = CACHE_HITS.labels("negative")._value.get()
+    misses = CACHE_MISSES._value.get()
+
+    first = graph_client.business_discovery_batch(["shop", "gone"], ["username"])
+    second = graph_client.business_discovery_batch(["shop", "gone"], ["username"])
+
+    assert first == second
+    assert second["gone"] is None
+    assert requested == [2]
+    assert CACHE_MISSES._value.get() == misses + 2
+    assert CACHE_HITS.labels("negative")._value.get() == hits + 1
+    assert cache.client.ttl(cache.key("shop", ["username"])) == 100
+    assert cache.client.ttl(cache.key("gone", ["username"])) == 10
+
+
+def test_single_lookup_caches_missing_accounts_but_not_auth_errors(monkeypatch):
+    errors = {
+        "gone": (400, {"error": {"code": 110, "message": "Invalid user id"}}),
+        "expired": (400, {"error": {"code": 190, "message": "Session expired"}}),
+    }
+
+    def handler(request):
+        status, body = errors[request.url.path.rsplit("/", 1)[-1]]
+        return httpx.Response(status, json=body)
+
+    cache = ResponseCache(fakeredis.FakeRedis())
+    monkeypatch.setattr(graph_client, "_response_cache", cache)
+    monkeypatch.setattr(
+        graph_client,
+        "_client",
+        httpx.Client(
+            base_url=graph_client.BASE_URL, transport=httpx.MockTransport(handler)
+        ),
+    )
+    monkeypatch.setattr(graph_client, "IG_USER_ID", "gone")
+    assert graph_client.business_discovery("gone", ["username"]) is None
+    assert cache.get_many(["gone"], ["username"]) == {"gone": None}
+
+    monkeypatch.setattr(graph_client, "IG_USER_ID", "expired")
+    with pytest.raises(graph_client.GraphAPIError):
+        graph_client.business_discovery("expired", ["username"])
+    assert cache.get_many(["expired"], ["username"]) == {}
+
+
+def test_cache_key_depends_on_field_set():
+    cache = ResponseCache(fakeredis.FakeRedis())
+    assert cache.key("Shop", ["a", "b"]) == cache.key("shop", ["b", "a"])
+    assert cache.key("shop", ["a"]) != cache.key("shop", ["a", "b"])
@@ -1,34 +1,101 @@
 from __future__ import annotations
 
+import asyncio
 import json
 from pathlib import Path
 
-import requests  # type: ignore[import]
+import httpx
+import pytest
 
 from shared import graph_client
 
 
-class DummyResponse:
-    def __init__(self, status_code: int, data: dict):
-        self.status_code = status_code
-        self._data = data
-
-    def json(self):
-        return self._data
+def _fixture(name: str) -> dict:
+    return json.load(open(Path("tests/data") / name))
 
 
 def test_retry_rate_limit(monkeypatch):
     fixtures = [
-        (429, json.load(open(Path("tests/data/rate_limit.json")))),
-        (200, json.load(open(Path("tests/data/business_success.json")))),
+        (429, _fixture("rate_limit.json")),
+        (200, _fixture("business_success.json")),
     ]
     calls = {"n": 0}
 
-    def fake_request(method, url, params=None, timeout=10):
+    def handler(request):
         code, data = fixtures[calls["n"]]
         calls["n"] += 1
-        return DummyResponse(code, data)
+        return httpx.Response(code, json=data)
 
-    monkeypatch.setattr(requests, "request", fake_request)
+    client = httpx.Client(
+        base_url=graph_client.BASE_URL, transport=httpx.MockTransport(handler)
+    )
+    monkeypatch.setattr(graph_client, "_client", client)
+    monkeypatch.setattr(graph_client.time, "sleep", lambda s: None)
     data = graph_client._request("GET", "test", {})
     assert data["business_discovery"]["username"] == "testbakery"
+    assert calls["n"] == 2
+
+
+def test_async_business_discovery_respects_concurrency():
+    state = {"active": 0, "peak": 0}
+
+    async def handler(request):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        username = request.url.params["fields"].split("(")[1].split(")")[0]
+        return httpx.Response(200, json={"business_discovery": {"username": username}})
+
+    async def run():
+        async with graph_client.AsyncGraphClient(
+            concurrency=3, transport=httpx.MockTransport(handler)
+        ) as client:
+            return await client.business_discovery_many(
+                [f"user{i}" for i in range(10)], ["username"]
+            )
+
+    results = asyncio.run(run())
+    assert results["user7"] == {"username": "user7"}
+    assert state["peak"] == 3
+
+
+def _batch_client(*items):
+    def handler(request):
+        batch = json.loads(dict(httpx.QueryParams(request.content.decode()))["batch"])
+        assert len(batch) == len(items)
+        return httpx.Response(
+            200, json=[{"code": code, "body": json.dumps(body)} for code, body in items]
+        )
+
+    return httpx.Client(
+        base_url=graph_client.BASE_URL, transport=httpx.MockTransport(handler)
+    )
+
+
+def test_business_discovery_batch(monkeypatch):
+    success = _fixture("business_success.json")
+    not_found = {"error": {"code": 110, "message": "Invalid user id"}}
+    throttled = {"error": {"code": 4, "message": "Rate limit"}}
+    client = _batch_client(
+        (200, success), (400, not_found), (400, throttled), (503, {})
+    )
+    monkeypatch.setattr(graph_client, "_client", client)
+    results = graph_client.business_discovery_batch(
+        ["testbakery", "missing", "later", "down"], ["username"]
+    )
+    assert results == {
+        "testbakery": success["business_discovery"],
+        "missing": None,
+    }
+
+
+def test_business_discovery_batch_raises_on_auth_errors(monkeypatch):
+    success = _fixture("business_success.json")
+    denied = {"error": {"code": 200, "message": "Permissions error"}}
+    monkeypatch.setattr(
+        graph_client, "_client", _batch_client((200, success), (403, denied))
+    )
+    with pytest.raises(graph_client.GraphAPIError) as exc:
+        graph_client.business_discovery_batch(["testbakery", "denied"], ["username"])
+    assert (exc.value.code, exc.value.status) == (200, 403)
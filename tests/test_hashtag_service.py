@@ -1,7 +1,15 @@
 from __future__ import annotations
 
+from datetime import datetime
+
+import fakeredis
+import sqlalchemy as sa
+from rq import Queue
+
 from services.ingestion import hashtag_service
-from shared.db import Base, engine
+from shared import redis_client
+from shared.db import Base, engine, session_scope
+from shared.models import Account, Media
 
 
 def setup_module(module):
@@ -16,14 +24,95 @@ def test_discover_usernames(monkeypatch):
     def fake_search(q):
         return [{"id": "1"}]
 
-    def fake_media(hashtag_id, cursor):
+    def fake_media(hashtag_id, cursor, stop_at=None):
         return iter([{"username": "user1"}, {"username": "user2"}])
 
     monkeypatch.setattr(
-        hashtag_service.graph_client, "ig_hashtag_search", lambda q: fake_search(q)
+        hashtag_service.graph_client,
+        "ig_hashtag_search_many",
+        lambda queries: [fake_search(q) for q in queries],
     )
     monkeypatch.setattr(
-        hashtag_service, "fetch_recent_media", lambda hid, c: fake_media(hid, c)
+        hashtag_service,
+        "fetch_recent_media",
+        lambda hid, c, stop_at=None: fake_media(hid, c, stop_at),
     )
     handles = hashtag_service.discover_usernames(["bread"])
     assert set(handles) == {"user1", "user2"}
+
+
+def test_repeat_crawl_stops_at_high_water_mark(monkeypatch):
+    pages = {
+        None: {
+            "data": [
+                {"id": "m3", "username": "a", "timestamp": "2024-05-03T10:00:00+0000"},
+                {"id": "m2", "username": "b", "timestamp": "2024-05-02T10:00:00+0000"},
+            ],
+            "paging": {"cursors": {"after": "p2"}},
+        },
+        "p2": {
+            "data": [
+                {"id": "m1", "username": "c", "timestamp": "2024-05-01T10:00:00+0000"}
+            ]
+        },
+    }
+    calls = []
+
+    def fake_recent_media(hashtag_id, after=None):
+        calls.append(after)
+        return pages[after]
+
+    monkeypatch.setattr(
+        hashtag_service.graph_client,
+        "ig_hashtag_search_many",
+        lambda queries: [[{"id": "42"}] for q in queries],
+    )
+    monkeypatch.setattr(
+        hashtag_service.graph_client, "hashtag_recent_media", fake_recent_media
+    )
+
+    assert set(hashtag_service.discover_usernames(["bread"])) == {"a", "b", "c"}
+    assert calls == [None, "p2"]
+    with session_scope() as session:
+        assert session.scalar(sa.select(sa.func.count()).select_from(Media)) == 3
+        account = session.scalar(sa.select(Account).where(Account.username == "a"))
+        assert account.last_post_at == datetime(2024, 5, 3, 10)
+
+    calls.clear()
+    pages[None]["data"].insert(
+        0, {"id": "m4", "username": "d", "timestamp": "2024-05-04T09:00:00+0000"}
+    )
+    assert hashtag_service.discover_usernames(["bread"]) == ["d"]
+    assert calls == [None]
+    assert hashtag_service.load_marks(["42"])["42"].media_id == "m4"
+
+
+def test_fan_out_and_merge(monkeypatch):
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(redis_client, "_redis", redis)
+    monkeypatch.setattr(redis_client, "_queues", {})
+    monkeypatch.setattr(
+        hashtag_service.graph_client,
+        "ig_hashtag_search_many",
+        lambda queries: [[{"id": "7"}, {"id": "8"}], [{"id": "8"}]],
+    )
+    media = {"7": ["x", "y"], "8": ["y", "z"]}
+    monkeypatch.setattr(
+        hashtag_service,
+        "fetch_recent_media",
+        lambda hid, c, stop_at=None: iter({"username": u} for u in media[hid]),
+    )
+
+    run = hashtag_service.fan_out_discovery(["bread", "cake"])
+    queue = Queue("discover", connection=redis)
+    assert run["hashtags"] == 2
+    assert [job.args for job in queue.get_jobs()] == [
+        ("7", run["run_id"]),
+        ("8", run["run_id"]),
+    ]
+    assert queue.deferred_job_registry.get_job_ids() == [run["merge_job_id"]]
+
+    for job in queue.get_jobs():
+        job.perform()
+    assert hashtag_service.merge_discovery(run["run_id"]) == ["x", "y", "z"]
+    assert not redis.exists(f"discover:{run['run_id']}:usernames")
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from services.ingestion import writer
+from shared.db import Base, engine, session_scope
+from shared.models import Account, Media
+
+
+def setup_module(module):
+    Base.metadata.create_all(engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(engine)
+
+
+def test_persist_discovered_counts_duplicates():
+    first = writer.persist_discovered(
+        [("Alpha", "maps", None), ("alpha", "maps", None), ("beta", "maps", None)]
+    )
+    assert first == {"inserted": 2, "duplicates": 0, "total": 2}
+
+    second = writer.persist_discovered(
+        [("beta", "hashtag", {"hashtag_id": "1"}), ("gamma", "hashtag", None)],
+        batch_size=1,
+    )
+    assert second == {"inserted": 1, "duplicates": 1, "total": 2}
+    with session_scope() as session:
+        beta = session.scalar(sa.select(Account).where(Account.username == "beta"))
+        assert beta.source == "maps"
+        assert beta.status == "DISCOVERED"
+
+
+def test_persist_discovered_without_returning(monkeypatch):
+    monkeypatch.setattr(engine.dialect, "insert_returning", False)
+    result = writer.persist_discovered(
+        [("delta", "web_search", None), ("alpha", "web_search", None)]
+    )
+    assert result == {"inserted": 1, "duplicates": 1, "total": 2}
+
+
+def test_persist_media_updates_last_post_at():
+    writer.persist_discovered([("epsilon", "hashtag", None)])
+    media = [
+        {"username": "Epsilon", "ig_media_id": "1", "taken_at": datetime(2024, 1, 1)},
+        {"username": "epsilon", "ig_media_id": "2", "taken_at": datetime(2024, 3, 1)},
+        {"username": "epsilon", "ig_media_id": "2", "taken_at": datetime(2024, 3, 1)},
+        {"username": "unknown", "ig_media_id": "3", "taken_at": datetime(2024, 4, 1)},
+    ]
+    assert writer.persist_media(media) == 3
+    writer.persist_media(media[:1])
+    with session_scope() as session:
+        account = session.scalar(
+            sa.select(Account).where(Account.username == "epsilon")
+        )
+        assert account.last_post_at == datetime(2024, 3, 1)
+        assert len(session.scalars(sa.select(Media)).all()) == 2
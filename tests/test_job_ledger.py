@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import uuid
+
+import fakeredis
+import pytest
+import sqlalchemy as sa
+from rq.job import Job as RQJob
+
+from services.workers.worker import SimpleWorker
+from shared import job_ledger, redis_client
+from shared.db import Base, engine, session_scope
+from shared.models import Job
+
+
+def setup_module(module):
+    Base.metadata.create_all(engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(engine)
+
+
+def test_lifecycle_events_are_flushed_to_jobs(monkeypatch):
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(redis_client, "_redis", redis)
+    monkeypatch.setattr(redis_client, "_queues", {})
+    queue = redis_client.get_queue("enrich")
+    ok = queue.enqueue("builtins.len", ["x"])
+    bad = queue.enqueue("builtins.int", "not a number")
+    assert redis.llen(job_ledger.LEDGER_KEY) == 2
+
+    SimpleWorker([queue], connection=redis).work(burst=True)
+    assert job_ledger.flush_all(redis, batch_size=3) == 6
+    assert not redis.exists(job_ledger.LEDGER_KEY)
+
+    with session_scope() as session:
+        jobs = {str(j.id): j for j in session.scalars(sa.select(Job))}
+    assert (jobs[ok.id].type, jobs[ok.id].status) == ("len", "finished")
+    assert (jobs[bad.id].type, jobs[bad.id].status) == ("int", "failed")
+    assert "ValueError" in jobs[bad.id].error
+    for job in jobs.values():
+        assert job.attempts == 1
+        assert job.created_at <= job.started_at <= job.finished_at
+        assert job.payload_json == {"queue": "enrich"}
+
+    # A retry of the failed job reopens its row.
+    job_ledger.record(redis, bad, "queued")
+    job_ledger.flush(redis)
+    with session_scope() as session:
+        row = session.get(Job, jobs[bad.id].id)
+        assert (row.status, row.attempts, row.finished_at) == ("queued", 1, None)
+
+
+def test_failed_flush_keeps_events(monkeypatch):
+    redis = fakeredis.FakeRedis()
+    job = RQJob.create("builtins.len", args=(["x"],), connection=redis)
+    job_ledger.record(redis, job, "queued")
+
+    def broken_upsert(rows):
+        raise ConnectionError("database down")
+
+    monkeypatch.setattr(job_ledger, "_upsert", broken_upsert)
+    with pytest.raises(ConnectionError):
+        job_ledger.flush(redis)
+    assert redis.llen(job_ledger.LEDGER_KEY) == 1
+    assert not redis.exists(job_ledger.LEDGER_LOCK_KEY)
+
+    # Another process holding the lock makes this flush a no-op.
+    monkeypatch.undo()
+    redis.set(job_ledger.LEDGER_LOCK_KEY, "other")
+    assert job_ledger.flush(redis) == 0
+    redis.delete(job_ledger.LEDGER_LOCK_KEY)
+    assert job_ledger.flush(redis) == 1
+    assert not redis.exists(job_ledger.LEDGER_KEY)
+
+
+def test_replayed_events_do_not_recount_attempts(monkeypatch):
+    redis = fakeredis.FakeRedis()
+    job = RQJob.create("builtins.len", args=(["x"],), connection=redis)
+    job.save()
+    attempt = job_ledger.next_attempt(redis, job)
+    job_ledger.record(redis, job, "started", attempt=attempt)
+
+    # The lock expires and is taken over while the batch is being written,
+    # so this flush must leave its events for the new holder to replay.
+    upsert = job_ledger._upsert
+
+    def slow_upsert(rows):
+        upsert(rows)
+        redis.set(job_ledger.LEDGER_LOCK_KEY, "other")
+
+    monkeypatch.setattr(job_ledger, "_upsert", slow_upsert)
+    assert job_ledger.flush(redis) == 0
+    assert redis.llen(job_ledger.LEDGER_KEY) == 1
+    monkeypatch.undo()
+    redis.delete(job_ledger.LEDGER_LOCK_KEY)
+    assert job_ledger.flush(redis) == 1
+
+    def attempts():
+        with session_scope() as session:
+            return session.get(Job, uuid.UUID(job.id)).attempts
+
+    assert attempts() == 1
+
+    # A second start counts once more; replaying the first one does not.
+    job_ledger.record(
+        redis, job, "started", attempt=job_ledger.next_attempt(redis, job)
+    )
+    job_ledger.record(redis, job, "started", attempt=1)
+    job_ledger.flush(redis)
+    assert attempts() == 2
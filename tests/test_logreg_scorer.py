@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import sys
+from dataclasses import replace
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from services.ranking.features import FEATURE_COLUMNS, FEATURE_VERSION
+from services.ranking.scorers import LogRegScorer, ModelArtifact
+
+
+def _dataset():
+    rng = np.random.default_rng(0)
+    X = rng.random((200, len(FEATURE_COLUMNS)), dtype=np.float32)
+    y = (X[:, 0] + X[:, 2] > 1.0).astype(int)
+    return X, y
+
+
+def test_logreg_artifact_roundtrip(tmp_path):
+    X, y = _dataset()
+    path = tmp_path / "model.npz"
+    LogRegScorer(path).train(X, y)
+
+    loaded = LogRegScorer(path)
+    assert loaded.artifact.columns == FEATURE_COLUMNS
+    expected = LogisticRegression().fit(X, y).predict_proba(X)[:, 1]
+    np.testing.assert_allclose(loaded.score(X), expected, atol=1e-5)
+    _, reasons = loaded.score_batch(X)
+    assert set(reasons) == {f"logreg {loaded.artifact.version}"}
+
+
+def test_logreg_scoring_does_not_import_sklearn(tmp_path, monkeypatch):
+    X, y = _dataset()
+    path = tmp_path / "model.npz"
+    LogRegScorer(path).train(X, y)
+    monkeypatch.setitem(sys.modules, "sklearn", None)
+    assert LogRegScorer(path).score(X).shape == (200,)
+
+
+def test_logreg_rejects_stale_feature_version(tmp_path):
+    X, y = _dataset()
+    path = tmp_path / "model.npz"
+    LogRegScorer(path).train(X, y)
+    artifact = ModelArtifact.load(path)
+    replace(artifact, feature_version=FEATURE_VERSION - 1).save(path)
+    with pytest.raises(ValueError, match="feature version"):
+        ModelArtifact.load(path)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.ingestion import maps_pipeline
+
+PAGES = {
+    "/shop": b"<html><body><a href='https://instagram.com/Shop_One'>ig</a></body>"
+    + b"<!-- instagram.com/after_body -->" * 100,
+    "/huge": b"<html><body>" + b"x" * 4096 + b"instagram.com/too_far</body>",
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PAGES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        # Write in small pieces so the client sees several chunks.
+        for i in range(0, len(body), 256):
+            self.wfile.write(body[i : i + 256])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_crawl_stops_at_body_end_and_size_limit(server_url):
+    results = asyncio.run(
+        maps_pipeline.crawl_instagram_links(
+            [f"{server_url}/shop", f"{server_url}/huge", f"{server_url}/missing"],
+            per_host_interval=0,
+            max_bytes=1024,
+        )
+    )
+    assert results[f"{server_url}/shop"] == ["shop_one"]
+    assert results[f"{server_url}/huge"] == []
+    assert results[f"{server_url}/missing"] == []
+
+
+def test_crawl_throttles_per_host(server_url):
+    started = time.monotonic()
+    asyncio.run(
+        maps_pipeline.crawl_instagram_links(
+            [f"{server_url}/shop", f"{server_url}/shop?again"],
+            per_host_interval=0.3,
+        )
+    )
+    assert time.monotonic() - started >= 0.3
+
+
+def test_find_instagram_links_handles_unreachable_sites():
+    assert maps_pipeline.find_instagram_links("http://127.0.0.1:9/") == []
+
+
+def test_crawl_skips_malformed_urls(server_url):
+    results = asyncio.run(
+        maps_pipeline.crawl_instagram_links(
+            ["http://[bad", f"{server_url}/shop"], per_host_interval=0
+        )
+    )
+    assert results == {"http://[bad": [], f"{server_url}/shop": ["shop_one"]}
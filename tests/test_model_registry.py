@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+
+from services.ranking.features import FEATURE_COLUMNS
+from services.ranking.registry import ModelRegistry
+from services.ranking.scorers import LogRegScorer, RuleScorer
+
+
+def _train(path, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.random((100, len(FEATURE_COLUMNS)), dtype=np.float32)
+    y = (X[:, 0] > 0.5).astype(int)
+    LogRegScorer(path).train(X, y)
+
+
+def test_registry_hot_swaps_model(tmp_path):
+    path = tmp_path / "model.npz"
+    registry = ModelRegistry(path, reload_interval=0)
+    assert isinstance(registry.get(), RuleScorer)
+
+    _train(path, seed=0)
+    first = registry.get()
+    assert isinstance(first, LogRegScorer)
+    assert registry.get() is first
+
+    _train(path, seed=1)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    second = registry.get()
+    assert second is not first
+    assert not np.array_equal(second.artifact.coef, first.artifact.coef)
+
+
+def test_registry_keeps_model_when_artifact_is_corrupt(tmp_path):
+    path = tmp_path / "model.npz"
+    _train(path, seed=0)
+    registry = ModelRegistry(path, reload_interval=0)
+    scorer = registry.get()
+    path.write_bytes(b"not a model")
+    assert registry.get() is scorer
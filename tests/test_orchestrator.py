@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+import sqlalchemy as sa
+from rq import Queue
+from rq.job import Job, JobStatus
+
+from services.workers import orchestrator
+from shared import redis_client
+from shared.db import Base, engine, session_scope
+from shared.graph_client import GraphAPIError
+from shared.models import Account
+
+
+def setup_module(module):
+    Base.metadata.create_all(engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(engine)
+
+
+def _redis(monkeypatch):
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(redis_client, "_redis", redis)
+    monkeypatch.setattr(redis_client, "_queues", {})
+    return redis
+
+
+def _discovered(prefix, count, created_at=None):
+    with session_scope() as session:
+        session.execute(sa.delete(Account))
+        session.add_all(
+            Account(
+                username=f"{prefix}{i}",
+                status="DISCOVERED",
+                created_at=created_at or datetime.utcnow(),
+            )
+            for i in range(count)
+        )
+
+
+def _statuses():
+    with session_scope() as session:
+        rows = session.execute(
+            sa.select(Account.status, sa.func.count()).group_by(Account.status)
+        ).all()
+    return dict(rows)
+
+
+def test_tick_claims_batches_and_chains_scoring(monkeypatch):
+    redis = _redis(monkeypatch)
+    now = datetime.utcnow()
+    _discovered("shop", 120, now)
+
+    # Only whole batches go while the oldest account is still fresh.
+    stats = orchestrator.tick()
+    assert stats["claimed"] == 100
+    assert stats["jobs"] == 2
+    enrich = Queue("enrich", connection=redis)
+    rank = Queue("rank", connection=redis)
+    assert [len(job.args[0]) for job in enrich.get_jobs()] == [50, 50]
+    deferred = rank.deferred_job_registry.get_job_ids()
+    assert len(deferred) == 2
+    # Scoring still runs when its enrich job fails.
+    assert all(
+        Job.fetch(job_id, connection=redis).allow_dependency_failures
+        for job_id in deferred
+    )
+
+    # Backpressure: two jobs queued already fill a depth of two.
+    assert orchestrator.tick(max_queue_depth=2)["claimed"] == 0
+
+    later = now + orchestrator.ORCHESTRATE_MAX_WAIT + timedelta(seconds=1)
+    assert len(orchestrator.claim_discovered(1000, now=later, claim_id="x")) == 20
+    assert orchestrator.claim_discovered(1000, now=later) == []
+
+    # Ended jobs hand back what they left claimed: via their callback, or on
+    # a later tick once none of the claim's jobs is alive.
+    first, second = enrich.get_jobs()
+    first.set_status(JobStatus.FINISHED)
+    orchestrator.release_claims(first, redis)
+    assert orchestrator.release_orphaned_claims(redis) == 0
+    second.set_status(JobStatus.FAILED)
+    assert orchestrator.release_orphaned_claims(redis) == 50
+    assert not redis.exists(orchestrator.CLAIMS_KEY)
+    assert _statuses() == {"DISCOVERED": 100, orchestrator.CLAIMED_STATUS: 20}
+
+    # A late callback from the old claim leaves a newer claim's accounts alone.
+    assert len(orchestrator.claim_discovered(1000, now=later, claim_id="y")) == 100
+    orchestrator.release_claims(first, redis)
+    assert _statuses() == {orchestrator.CLAIMED_STATUS: 120}
+
+
+def test_claim_is_released_when_enqueue_fails(monkeypatch):
+    redis = _redis(monkeypatch)
+    _discovered("crash", 50)
+
+    def enqueue(*args, **kwargs):
+        raise ConnectionError("redis went away")
+
+    monkeypatch.setattr(orchestrator, "enqueue_enrich_and_score", enqueue)
+    with pytest.raises(ConnectionError):
+        orchestrator.tick()
+    assert _statuses() == {orchestrator.CLAIMED_STATUS: 50}
+    assert orchestrator.release_orphaned_claims(redis) == 50
+    assert _statuses() == {"DISCOVERED": 50}
+
+
+def test_claiming_pauses_after_auth_errors_and_retries(monkeypatch):
+    redis = _redis(monkeypatch)
+    _discovered("paused", 50)
+    job = Job.create(
+        "builtins.len", args=(["x"],), meta={"claim_id": "c"}, connection=redis
+    )
+    error = GraphAPIError(190, "Session has expired", status=400)
+    orchestrator.enrich_failed(job, redis, GraphAPIError, error, None)
+    assert redis.ttl(orchestrator.PAUSE_KEY) > orchestrator.ORCHESTRATE_RETRY_PAUSE
+    stats = orchestrator.tick()
+    assert (stats["paused"], stats["claimed"]) == (True, 0)
+
+    redis.delete(orchestrator.PAUSE_KEY)
+    orchestrator.enrich_succeeded(job, redis, {"retry": ["x"], "retry_after": 300.0})
+    assert 290 < redis.ttl(orchestrator.PAUSE_KEY) <= 300
+
+
+def test_run_survives_failing_ticks(monkeypatch):
+    ticks = []
+
+    def tick():
+        ticks.append(1)
+        if len(ticks) == 1:
+            raise ConnectionError("redis down")
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(orchestrator, "tick", tick)
+    with pytest.raises(KeyboardInterrupt):
+        orchestrator.run(interval=0)
+    assert len(ticks) == 2
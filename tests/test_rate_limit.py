@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+
+import fakeredis
+import httpx
+import pytest
+
+from shared import graph_client
+from shared.rate_limit import RateLimiter, RateLimitExceeded, parse_usage
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+def _limiter(server, **kwargs):
+    return RateLimiter(fakeredis.FakeRedis(server=server), rate=10, period=10, **kwargs)
+
+
+def test_workers_share_one_schedule(redis_server):
+    first, second = _limiter(redis_server, burst=2), _limiter(redis_server, burst=2)
+    delays = [first.reserve(), second.reserve(), first.reserve(), second.reserve()]
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2] == pytest.approx(1.0, abs=0.1)
+    assert delays[3] == pytest.approx(2.0, abs=0.1)
+
+
+def test_max_wait_refuses_without_booking(redis_server):
+    limiter = _limiter(redis_server, burst=2)
+    assert limiter.reserve(2) == 0.0
+    with pytest.raises(RateLimitExceeded) as exc:
+        limiter.reserve(5, max_wait=1)
+    assert exc.value.wait == pytest.approx(5.0, abs=0.1)
+    # The refused reservation left the schedule alone.
+    assert limiter.reserve(1) == pytest.approx(1.0, abs=0.1)
+
+
+def test_usage_headers_slow_down_all_workers(redis_server):
+    first, second = _limiter(redis_server), _limiter(redis_server)
+    headers = httpx.Headers(
+        {"X-App-Usage": json.dumps({"call_count": 100, "total_time": 10})}
+    )
+    first.record_usage(headers)
+    second.reserve()
+    assert second.reserve() == pytest.approx(10.0, abs=0.1)
+
+
+def test_regain_access_blocks_callers(redis_server):
+    limiter = _limiter(redis_server)
+    buc = {"123": [{"type": "instagram", "estimated_time_to_regain_access": 2}]}
+    limiter.record_usage(httpx.Headers({"X-Business-Use-Case-Usage": json.dumps(buc)}))
+    assert limiter.reserve() == pytest.approx(120.0, abs=1.0)
+
+
+def test_parse_usage_ignores_malformed_headers():
+    assert parse_usage({"x-app-usage": "not json"}) == (0.0, 0.0)
+
+
+def test_request_consults_limiter(monkeypatch, redis_server):
+    limiter = _limiter(redis_server)
+    reserved = []
+    monkeypatch.setattr(
+        limiter, "acquire", lambda cost=1, max_wait=None: reserved.append(cost)
+    )
+    monkeypatch.setattr(graph_client, "_rate_limiter", limiter)
+    client = httpx.Client(
+        base_url=graph_client.BASE_URL,
+        transport=httpx.MockTransport(
+            lambda r: httpx.Response(
+                200, json={"data": []}, headers={"X-App-Usage": '{"call_count": 80}'}
+            )
+        ),
+    )
+    monkeypatch.setattr(graph_client, "_client", client)
+    graph_client.ig_hashtag_search("bread")
+    assert reserved == [1]
+    assert float(limiter.client.get("ratelimit:graph:usage")) == 80.0
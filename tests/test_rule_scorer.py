@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import numpy as np
+
+from services.ranking.features import COLUMN_INDEX, FEATURE_COLUMNS
 from services.ranking.scorers import RuleScorer
 
 
@@ -10,3 +13,22 @@ def test_rule_scorer():
     )
     assert score > 0.8
     assert "bio keyword" in reason
+
+
+def test_rule_scorer_batch_matches_per_row():
+    scorer = RuleScorer()
+    rows = [
+        {"bio_keyword": 1.0, "website_nl": 1.0, "followers_bucket": 2.0},
+        {"bio_keyword": 1.0, "followers_bucket": 1.0},
+        {"website_nl": 1.0, "followers_bucket": 3.5},
+        {},
+    ]
+    matrix = np.zeros((len(rows), len(FEATURE_COLUMNS)), dtype=np.float32)
+    for i, row in enumerate(rows):
+        for name, value in row.items():
+            matrix[i, COLUMN_INDEX[name]] = value
+    scores, reasons = scorer.score_batch(matrix)
+    for row, score, reason in zip(rows, scores, reasons):
+        expected_score, expected_reason = scorer.score(row)
+        assert score == expected_score
+        assert reason == expected_reason
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from services.ingestion import search_pivot
+from shared.db import Base, engine
+
+
+def setup_module(module):
+    Base.metadata.create_all(engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(engine)
+
+
+def test_import_csv_flushes_in_batches(tmp_path):
+    path = tmp_path / "export.csv"
+    lines = ["title,url"]
+    lines += [f"post,https://instagram.com/shop{i % 5}/" for i in range(12)]
+    lines += ["other,https://example.com/", "empty,"]
+    path.write_text("\n".join(lines) + "\n")
+    reports = []
+
+    result = search_pivot.import_csv(
+        path, batch_size=2, progress=reports.append, delete_after=True
+    )
+
+    assert result == {
+        "rows": 14,
+        "valid_handles": 12,
+        "inserted": 5,
+        "duplicates": 7,
+        "total": 12,
+    }
+    assert len(reports) == 7
+    assert reports[-1] == result
+    assert not path.exists()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from services.ranking import training
+from services.ranking.scorers import LogRegScorer
+from shared.db import Base, engine, session_scope
+from shared.models import Account, Lead
+
+
+def setup_module(module):
+    Base.metadata.create_all(engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(engine)
+
+
+def test_train_model_from_lead_stages(tmp_path):
+    with session_scope() as session:
+        for i in range(200):
+            good = i % 2 == 0
+            account = Account(
+                username=f"user{i}",
+                bio="Bakery in Amsterdam" if good else "Car repair",
+                website="https://shop.nl" if good else "https://shop.com",
+                metrics_json={"followers_count": 100 * i, "media_count": i},
+            )
+            session.add(account)
+            session.add(Lead(account=account, stage="VETTED" if good else "REJECTED"))
+        session.add(Lead(account=Account(username="new"), stage="NEW"))
+
+    path = tmp_path / "models" / "logreg.npz"
+    report = training.train_model(path, chunk_size=32, folds=3)
+
+    assert report["train_rows"] + report["holdout_rows"] == 200
+    assert report["cv_auc"] > 0.9
+    assert report["holdout_auc"] > 0.9
+    assert LogRegScorer(path).artifact.version == report["version"]
+    # Retraining straight away still produces a new version.
+    again = training.train_model(path, chunk_size=32, folds=3)
+    assert again["version"] != report["version"]
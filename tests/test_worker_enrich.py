@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import fakeredis
+from rq import Queue, SimpleWorker
+
+from services.enrichment.enrichment_service import BUSINESS_FIELDS
+from services.workers import worker
+from shared import graph_client, redis_client
+from shared.db import Base, engine, session_scope
+from shared.graph_cache import ResponseCache
+from shared.models import Account
+
+
+def setup_module(module):
+    Base.metadata.create_all(engine)
+
+
+def teardown_module(module):
+    Base.metadata.drop_all(engine)
+
+
+def test_enqueue_enrich_bulk_dedupes_and_reports(monkeypatch):
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(redis_client, "_redis", redis)
+    monkeypatch.setattr(redis_client, "_queues", {})
+    monkeypatch.setattr(worker, "BATCH_SIZE", 2)
+    monkeypatch.setattr(
+        graph_client,
+        "business_discovery_batch",
+        lambda usernames, fields, max_wait=None: {u: None for u in usernames},
+    )
+    with session_scope() as session:
+        session.add(Account(username="fresh", source="manual", status="ENRICHED"))
+    # A cached lookup whose enrichment was never committed is not skipped.
+    redis.set(ResponseCache(redis).key("c", BUSINESS_FIELDS), "null")
+
+    first = worker.enqueue_enrich_bulk(["a", "B", "b", "c", "fresh", " "])
+    assert first["enqueued"] == 3
+    assert first["recently_enriched"] == 1
+    queue = Queue("enrich", connection=redis)
+    assert [job.args for job in queue.get_jobs()] == [(["a", "b"],), (["c"],)]
+
+    second = worker.enqueue_enrich_bulk(["a", "d"])
+    assert second["enqueued"] == 1
+    assert second["already_queued"] == 1
+
+    SimpleWorker([queue], connection=redis).work(burst=True)
+    batch = worker.fetch_enrich_batch(first["batch_id"])
+    assert batch["jobs"] == {"finished": 2}
+    assert batch["result"]["not_found"] == 3
+    assert not redis.exists(worker._pending_key("a"))
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import pytest
+
+from services.workers import pool
+
+
+def test_parse_concurrency():
+    assert pool.parse_concurrency("discover=4, enrich=8,rank=0,") == {
+        "discover": 4,
+        "enrich": 8,
+        "rank": 0,
+    }
+    with pytest.raises(ValueError):
+        pool.parse_concurrency("discover")
+    with pytest.raises(ValueError):
+        pool.parse_concurrency("rank=-1")
+
+
+def test_pool_restarts_exited_workers(monkeypatch):
+    monkeypatch.setattr(pool, "_work", lambda queue_name: None)
+    workers = pool.WorkerPool({"discover": 2, "rank": 1})
+    workers.start()
+    first = set(workers._procs)
+    for proc in first:
+        proc.join(5)
+    workers.reap()
+    assert len(workers._procs) == 3
+    assert not first & set(workers._procs)
+    assert sorted(workers._procs.values()) == ["discover", "discover", "rank"]
+    workers.stop(timeout=5)
+    assert not workers._procs
+
+
+def test_pool_flushes_ledger_after_stopping(monkeypatch):
+    flushed = []
+    monkeypatch.setattr(pool, "_work", lambda queue_name: None)
+    monkeypatch.setattr(pool.job_ledger, "flush_all", flushed.append)
+    monkeypatch.setattr(pool, "get_redis", lambda: "redis")
+    monkeypatch.setattr(pool.signal, "signal", lambda signum, handler: None)
+    workers = pool.WorkerPool({"rank": 1})
+    monkeypatch.setattr(workers, "reap", lambda: setattr(workers, "_stopping", True))
+    workers.run()
+    assert flushed == ["redis"]